@@ -0,0 +1,161 @@
+"""
+Compare the sync WSGI catalogue endpoints with the async ASGI ones at
+equal memory.
+
+For each server the script starts gunicorn with one worker to measure
+what a worker costs, then restarts it with as many workers as fit in
+--memory-mb, drives it with benchmarks/catalogue_locustfile.py and
+reports requests/second, p99 latency and the peak RSS of the process
+tree. Run it from the project root against a seeded database and Redis
+(the same .env as the app):
+
+    python benchmarks/asgi_vs_wsgi.py --memory-mb 600 --users 200 --run-time 60s
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import psutil
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOCUSTFILE = os.path.join(ROOT, 'benchmarks', 'catalogue_locustfile.py')
+
+SERVERS = {
+    'wsgi': {
+        'command': ['ecomApp.wsgi:application'],
+        'prefix': '/api/',
+    },
+    'asgi': {
+        'command': ['ecomApp.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'],
+        'prefix': '/api/async/',
+    },
+}
+
+
+def server_env():
+    env = dict(os.environ)
+    # Measure the serving path, not the rate limiter or debug bookkeeping.
+    env.setdefault('DEBUG', 'False')
+    env.setdefault('THROTTLE_ANON_RATE', '100000000/minute')
+    env.setdefault('THROTTLE_USER_RATE', '100000000/minute')
+    return env
+
+
+def start_server(name, workers, port):
+    server = SERVERS[name]
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', *server['command'],
+         '--bind', f'127.0.0.1:{port}', '--workers', str(workers)],
+        cwd=ROOT, env=server_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f'http://127.0.0.1:{port}{server["prefix"]}products/'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=10).status_code == 200:
+                # Let every worker import the app and fill its caches.
+                for _ in range(workers * 50):
+                    requests.get(url, timeout=5)
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    stop_server(process)
+    raise RuntimeError(f'{name} server did not come up on port {port}')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def rss(process):
+    """
+    Resident memory of gunicorn's arbiter and workers, in bytes.
+    """
+    root = psutil.Process(process.pid)
+    return sum(p.memory_info().rss for p in [root, *root.children(recursive=True)])
+
+
+def workers_for_budget(name, budget, port):
+    process = start_server(name, 1, port)
+    try:
+        arbiter = psutil.Process(process.pid).memory_info().rss
+        worker = rss(process) - arbiter
+    finally:
+        stop_server(process)
+    return max(1, (budget - arbiter) // worker)
+
+
+def run_load(name, workers, args):
+    process = start_server(name, workers, args.port)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            stats = os.path.join(directory, name)
+            env = dict(os.environ)
+            env['BENCHMARK_PREFIX'] = SERVERS[name]['prefix']
+            env['BENCHMARK_PRODUCTS'] = str(args.products)
+            locust = subprocess.Popen(
+                [sys.executable, '-m', 'locust', '-f', LOCUSTFILE, '--headless',
+                 '--host', f'http://127.0.0.1:{args.port}',
+                 '-u', str(args.users), '-r', str(args.users),
+                 '--run-time', args.run_time, '--csv', stats, '--only-summary'],
+                cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+            )
+            peak = 0
+            while locust.poll() is None:
+                peak = max(peak, rss(process))
+                time.sleep(0.5)
+            with open(f'{stats}_stats.csv') as stats_file:
+                row = next(row for row in csv.DictReader(stats_file) if row['Name'] == 'Aggregated')
+    finally:
+        stop_server(process)
+
+    return {
+        'server': name,
+        'workers': workers,
+        'requests': int(row['Request Count']),
+        'failures': int(row['Failure Count']),
+        'requests_per_second': round(float(row['Requests/s']), 1),
+        'p99_ms': float(row['99%']),
+        'peak_rss_mb': round(peak / 2 ** 20, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--memory-mb', type=int, default=600, help='RSS budget per server')
+    parser.add_argument('--users', type=int, default=200, help='Concurrent locust users')
+    parser.add_argument('--run-time', default='60s')
+    parser.add_argument('--products', type=int, default=1000, help='Highest product id to request')
+    parser.add_argument('--port', type=int, default=8010)
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+    for name in SERVERS:
+        workers = workers_for_budget(name, args.memory_mb * 2 ** 20, args.port)
+        results.append(run_load(name, workers, args))
+
+    print(f"{'server':<8}{'workers':>8}{'req/s':>10}{'p99 ms':>10}{'peak MB':>10}{'failures':>10}")
+    for result in results:
+        print(
+            f"{result['server']:<8}{result['workers']:>8}{result['requests_per_second']:>10}"
+            f"{result['p99_ms']:>10}{result['peak_rss_mb']:>10}{result['failures']:>10}"
+        )
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'memory_mb': args.memory_mb, 'users': args.users, 'results': results}, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
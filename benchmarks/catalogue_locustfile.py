@@ -0,0 +1,32 @@
+"""
+Read-only catalogue load used by benchmarks/asgi_vs_wsgi.py.
+
+BENCHMARK_PREFIX selects the endpoints ('/api/' for the WSGI viewsets,
+'/api/async/' for the ASGI views); BENCHMARK_PRODUCTS is the highest
+product id to request.
+"""
+import os
+import random
+
+from locust import FastHttpUser, constant, task
+
+PREFIX = os.environ.get('BENCHMARK_PREFIX', '/api/')
+PRODUCTS = int(os.environ.get('BENCHMARK_PRODUCTS', '1000'))
+
+
+class CatalogueReader(FastHttpUser):
+    wait_time = constant(0)  # Closed loop: measure throughput, not think time
+
+    @task(3)
+    def list_products(self):
+        page = random.randint(1, 5)
+        self.client.get(f'{PREFIX}products/?page={page}', name='products list')
+
+    @task(2)
+    def retrieve_product(self):
+        product_id = random.randint(1, PRODUCTS)
+        self.client.get(f'{PREFIX}products/{product_id}/', name='product detail')
+
+    @task(1)
+    def list_categories(self):
+        self.client.get(f'{PREFIX}categories/', name='categories list')
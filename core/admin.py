@@ -1,3 +1,11 @@
 from django.contrib import admin
+from .models import OutboxEvent
 
-# Register your models here.
+
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'topic', 'created_at', 'sent_at']
+    list_filter = ['topic']
+    readonly_fields = ['topic', 'payload', 'created_at', 'sent_at']
+
+
+admin.site.register(OutboxEvent, OutboxEventAdmin)
@@ -0,0 +1,453 @@
+import asyncio
+import hashlib
+import math
+import random
+import threading
+import time
+import uuid
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django_redis import get_redis_connection
+from rest_framework.response import Response
+
+from .db_router import primary_reads
+from .metrics import RESPONSE_CACHE
+from .tiered_cache import tiered_cache
+
+CACHE_TIMEOUT = 300  # 5 minutes
+STALE_TIMEOUT = 60  # Seconds an expired entry is kept to be served while it is recomputed
+LOCK_TIMEOUT = 10  # Longest a recompute may hold the refresh lock
+LOCK_WAIT = 2  # Seconds a cold miss waits for another worker's recompute
+XFETCH_BETA = 1.0  # > 1 refreshes earlier, < 1 later
+
+# Generations are milliseconds of the Redis clock, at least a second apart,
+# so each one falls in a later second than the last (see `response_validators`).
+# KEYS: generation key. Returns the new generation.
+BUMP_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local generation = tonumber(redis.call('GET', KEYS[1]))
+if generation and generation + 1000 > now then
+    now = generation + 1000
+end
+redis.call('SET', KEYS[1], string.format('%d', now))
+return now
+"""
+
+# Delete a lock only while it still holds the releasing worker's token.
+# KEYS: lock key. ARGV: token. Returns 1 when the lock was released.
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def generation_key(namespace):
+    return f'generation:{namespace}'
+
+
+def get_generation(namespace):
+    """
+    Return the current generation number for a cache namespace.
+
+    Every cached entry records the generation it was computed in, so
+    bumping the counter makes all existing entries stale at once.
+    """
+    key = generation_key(namespace)
+    generation = tiered_cache.get(key)
+    if generation is None:
+        # Seed from the clock so a counter lost to eviction can never
+        # restart at a value that older entries were stored under.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        generation = tiered_cache.get(key)
+    return generation
+
+
+async def aget_generation(namespace):
+    """
+    `get_generation` for async views.
+    """
+    key = generation_key(namespace)
+    generation = await tiered_cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, int(time.time() * 1000), timeout=None)
+        generation = await tiered_cache.aget(key)
+    return generation
+
+
+def bump_generation(namespace):
+    """
+    Invalidate every cached entry of a namespace in O(1).
+
+    The new generation is the time of the bump, so it also serves as the
+    namespace's Last-Modified. Atomic on Redis; other backends (tests,
+    local dev) read and write the counter separately.
+    """
+    key = generation_key(namespace)
+    try:
+        client = get_redis_connection('default')
+    except NotImplementedError:
+        generation = max(int(time.time() * 1000), (cache.get(key) or 0) + 1000)
+        cache.set(key, generation, timeout=None)
+    else:
+        generation = client.register_script(BUMP_SCRIPT)(keys=[cache.make_key(key)])
+    tiered_cache.invalidate(key)
+    return generation
+
+
+def is_current(entry, generation):
+    return entry['generation'] >= generation and time.time() < entry['expires']
+
+
+def entry_state(entry, generation):
+    """
+    'fresh', 'early' (fresh, but picked for early recomputation), 'stale'
+    (expired or from an older generation) or None when there is no entry.
+
+    Early recomputation is XFetch: the chance rises as expiry nears and with
+    how long the value took to compute, so one request usually refreshes a
+    hot entry before it expires and the others never see a miss.
+    """
+    if entry is None:
+        return None
+    if not is_current(entry, generation):
+        return 'stale'
+    if time.time() - entry['delta'] * XFETCH_BETA * math.log(1 - random.random()) >= entry['expires']:
+        return 'early'
+    return 'fresh'
+
+
+def make_entry(value, generation, timeout, delta):
+    return {'value': value, 'generation': generation, 'expires': time.time() + timeout, 'delta': delta}
+
+
+def on_primary(compute):
+    def wrapper():
+        with primary_reads():
+            return compute()
+    return wrapper
+
+
+def aon_primary(compute):
+    async def wrapper():
+        with primary_reads():
+            return await compute()
+    return wrapper
+
+
+def lock_key(key):
+    return f'{key}:lock'
+
+
+def lock_token():
+    # An int, which django_redis stores as its digits, so the release
+    # script can compare it with what GET returns.
+    return uuid.uuid4().int
+
+
+def release_lock(key, token):
+    """
+    Release a lock taken with `cache.add(key, token)`, unless it expired
+    and another worker holds it now. Atomic on Redis; other backends (tests,
+    local dev) compare and delete in two calls.
+    """
+    try:
+        client = get_redis_connection('default')
+    except NotImplementedError:
+        if cache.get(key) == token:
+            cache.delete(key)
+        return
+    client.register_script(RELEASE_SCRIPT)(keys=[cache.make_key(key)], args=[token])
+
+
+async def arelease_lock(key, token):
+    await sync_to_async(release_lock, thread_sensitive=False)(key, token)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.result = None
+
+
+# (key, generation) -> _Flight of the thread computing it in this process.
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def cached_value(key, generation, compute, timeout=CACHE_TIMEOUT):
+    """
+    Return `(value, result)` for `key`, calling `compute()` on a miss;
+    `result` is 'hit', 'stale' or 'miss'.
+
+    Stampede protection: across processes, only the holder of the key's
+    lock recomputes an expired or outdated entry while everyone else is
+    served the stale one; within a process, identical concurrent calls
+    wait for the first instead of computing too.
+
+    `compute()` reads from the primary: a replica that has not replayed
+    the write behind a generation bump would be cached under the new
+    generation.
+    """
+    compute = on_primary(compute)
+    entry = tiered_cache.get(key, validate=lambda entry: is_current(entry, generation))
+    state = entry_state(entry, generation)
+    if state == 'fresh':
+        return entry['value'], 'hit'
+
+    flight_key = (key, generation)
+    with _flights_lock:
+        flight = _flights.get(flight_key)
+        leader = flight is None
+        if leader:
+            flight = _flights[flight_key] = _Flight()
+    if not leader:
+        if state is not None:
+            return entry['value'], 'hit' if state == 'early' else 'stale'
+        if flight.done.wait(LOCK_TIMEOUT) and flight.result is not None:
+            return flight.value, 'hit'
+        return compute(), 'miss'
+
+    try:
+        flight.value, flight.result = _refresh(key, generation, compute, timeout, entry, state)
+        return flight.value, flight.result
+    finally:
+        with _flights_lock:
+            del _flights[flight_key]
+        flight.done.set()
+
+
+def _refresh(key, generation, compute, timeout, entry, state):
+    token = lock_token()
+    if cache.add(lock_key(key), token, timeout=LOCK_TIMEOUT):
+        try:
+            start = time.monotonic()
+            value = compute()
+            tiered_cache.set(
+                key, make_entry(value, generation, timeout, time.monotonic() - start),
+                timeout=timeout + STALE_TIMEOUT,
+            )
+            return value, 'miss'
+        finally:
+            release_lock(lock_key(key), token)
+
+    # Another worker is recomputing.
+    if state is not None:
+        return entry['value'], 'hit' if state == 'early' else 'stale'
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry_state(entry, generation) in ('fresh', 'early'):
+            return entry['value'], 'hit'
+    return compute(), 'miss'
+
+
+# (event loop, key, generation) -> future of the task computing it.
+_async_flights = {}
+
+
+async def acached_value(key, generation, compute, timeout=CACHE_TIMEOUT):
+    """
+    `cached_value` for async views; `compute` is a coroutine function.
+    """
+    compute = aon_primary(compute)
+    entry = await tiered_cache.aget(key, validate=lambda entry: is_current(entry, generation))
+    state = entry_state(entry, generation)
+    if state == 'fresh':
+        return entry['value'], 'hit'
+
+    loop = asyncio.get_running_loop()
+    flight_key = (loop, key, generation)
+    flight = _async_flights.get(flight_key)
+    if flight is not None:
+        if state is not None:
+            return entry['value'], 'hit' if state == 'early' else 'stale'
+        try:
+            value, result = await asyncio.wait_for(asyncio.shield(flight), LOCK_TIMEOUT)
+        except asyncio.TimeoutError:
+            result = None
+        if result is not None:
+            return value, 'hit'
+        return await compute(), 'miss'
+
+    flight = _async_flights[flight_key] = loop.create_future()
+    value, result = None, None
+    try:
+        value, result = await _arefresh(key, generation, compute, timeout, entry, state)
+        return value, result
+    finally:
+        del _async_flights[flight_key]
+        flight.set_result((value, result))
+
+
+async def _arefresh(key, generation, compute, timeout, entry, state):
+    token = lock_token()
+    if await cache.aadd(lock_key(key), token, timeout=LOCK_TIMEOUT):
+        try:
+            start = time.monotonic()
+            value = await compute()
+            await tiered_cache.aset(
+                key, make_entry(value, generation, timeout, time.monotonic() - start),
+                timeout=timeout + STALE_TIMEOUT,
+            )
+            return value, 'miss'
+        finally:
+            await arelease_lock(lock_key(key), token)
+
+    if state is not None:
+        return entry['value'], 'hit' if state == 'early' else 'stale'
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        entry = await cache.aget(key)
+        if entry_state(entry, generation) in ('fresh', 'early'):
+            return entry['value'], 'hit'
+    return await compute(), 'miss'
+
+
+def normalize_query(query_dict, ignore=()):
+    """
+    Canonical, order-independent form of a request's query string.
+    """
+    items = []
+    for name in sorted(query_dict.keys()):
+        if name in ignore:
+            continue
+        for value in sorted(query_dict.getlist(name)):
+            if value != '':
+                items.append((name, value))
+    return urlencode(items)
+
+
+def response_cache_key(namespace, host, visibility, suffix, query_dict):
+    parts = [host, visibility, suffix, normalize_query(query_dict)]
+    digest = hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+    return f'{namespace}:{digest}'
+
+
+def request_visibility(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return 'staff'
+    return 'public'
+
+
+def cached_representation(data):
+    """
+    What the response cache stores for a response.
+    """
+    return {'data': data}
+
+
+def response_validators(key, generation, timeout=CACHE_TIMEOUT):
+    """
+    ETag and Last-Modified of the response cached under `key` at
+    `generation`, derived without reading the entry or the database.
+
+    Both change with every bump and, since entries pick up writes that do
+    not bump (stock reservations) when they expire, every `timeout` seconds.
+    """
+    now = int(time.time())
+    period = now - now % timeout
+    digest = hashlib.md5(f'{key}|{generation}|{period}'.encode('utf-8')).hexdigest()
+    return {
+        'etag': f'W/"{digest}"',
+        # A generation falls in a later second than the one before it; one
+        # bumped in the period's first second is still after `period - 1`.
+        'last_modified': max(generation // 1000, period - 1),
+    }
+
+
+def add_cache_headers(request, response, validators=None):
+    """
+    Add the validators and Cache-Control to `response`.
+
+    Anonymous responses may be reused by shared caches (the nginx
+    microcache, CDNs) for CATALOGUE_S_MAXAGE seconds; clients revalidate
+    on every use.
+    """
+    if validators is not None:
+        response['ETag'] = validators['etag']
+        response['Last-Modified'] = http_date(validators['last_modified'])
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=0, s_maxage=settings.CATALOGUE_S_MAXAGE)
+    return response
+
+
+def not_modified(request, validators):
+    """
+    The 304 (or 412) for a conditional request whose answer follows from
+    `validators` alone, or None when the response has to be built.
+    """
+    response = add_cache_headers(request, HttpResponse(), validators)
+    conditional = get_conditional_response(
+        request, etag=validators['etag'], last_modified=validators['last_modified'], response=response,
+    )
+    return None if conditional is response else conditional
+
+
+class VersionedCacheMixin:
+    """
+    Caches `list` and `retrieve` responses under keys derived from the
+    query string, host and user visibility, scoped to a generation counter.
+    Call `bump_generation(cache_namespace)` to invalidate all variants;
+    until they are recomputed, concurrent requests get the stale response
+    (see `cached_value`). Responses carry an ETag and Last-Modified derived
+    from the generation, so conditional requests get a 304 before the
+    cache is even read.
+    """
+    cache_namespace = None
+    cache_key_prefix = ''  # Separates viewsets sharing a namespace
+    cache_timeout = CACHE_TIMEOUT
+
+    def get_cache_key(self, request, suffix):
+        return response_cache_key(
+            self.cache_namespace,
+            request.get_host(),
+            request_visibility(request),
+            f'{self.cache_key_prefix}{suffix}',
+            request.query_params,
+        )
+
+    def cached_response(self, request, suffix, compute):
+        key = self.get_cache_key(request, suffix)
+        generation = get_generation(self.cache_namespace)
+        validators = response_validators(key, generation, self.cache_timeout)
+        response = not_modified(request, validators)
+        if response is not None:
+            RESPONSE_CACHE.labels(self.cache_namespace, 'not_modified').inc()
+            return response
+
+        representation, result = cached_value(
+            key, generation, lambda: cached_representation(compute().data), timeout=self.cache_timeout,
+        )
+        RESPONSE_CACHE.labels(self.cache_namespace, result).inc()
+        # A stale entry predates the generation the validators describe.
+        return add_cache_headers(
+            request, Response(representation['data']), None if result == 'stale' else validators
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, 'list', lambda: super(VersionedCacheMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return self.cached_response(
+            request, f'detail:{lookup}',
+            lambda: super(VersionedCacheMixin, self).retrieve(request, *args, **kwargs)
+        )
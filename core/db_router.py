@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.connection import ConnectionDoesNotExist
+
+logger = logging.getLogger(__name__)
+
+# Per-request read routing state, set by core.middleware.ReplicaRoutingMiddleware.
+# None (management commands, Celery tasks, unsafe requests) means the primary.
+_replica_reads = ContextVar('replica_reads', default=None)
+
+# alias -> (healthy, monotonic time of the check), per process.
+_replica_health = {}
+
+LAG_QUERY = """
+SELECT CASE
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def check_replica(alias):
+    """
+    True when `alias` answers and, on PostgreSQL, replays within
+    `DATABASE_REPLICA_MAX_LAG` seconds of the primary.
+    """
+    try:
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(LAG_QUERY)
+                lag = cursor.fetchone()[0] or 0
+                if lag > settings.DATABASE_REPLICA_MAX_LAG:
+                    logger.warning("Replica %s is %.1fs behind, not routing reads to it.", alias, lag)
+                    return False
+            else:
+                cursor.execute('SELECT 1')
+        return True
+    except (ConnectionDoesNotExist, DatabaseError):
+        logger.warning("Replica %s is unavailable.", alias, exc_info=True)
+        return False
+
+
+def replica_is_healthy(alias):
+    healthy, checked_at = _replica_health.get(alias, (None, 0))
+    now = time.monotonic()
+    if healthy is None or now - checked_at >= settings.DATABASE_REPLICA_CHECK_INTERVAL:
+        healthy = check_replica(alias)
+        _replica_health[alias] = (healthy, now)
+    return healthy
+
+
+def mark_replica_down(alias):
+    """
+    Take `alias` out of rotation until its next health check.
+    """
+    _replica_health[alias] = (False, time.monotonic())
+
+
+def pin_key(identity):
+    digest = hashlib.sha256(identity.encode('utf-8')).hexdigest()
+    return f'db:primary-pin:{digest}'
+
+
+def pin_to_primary(identity):
+    """
+    Route `identity`'s reads to the primary for the stickiness window, so
+    it reads its own writes while replicas catch up.
+    """
+    cache.set(pin_key(identity), 1, timeout=settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+async def apin_to_primary(identity):
+    await cache.aset(pin_key(identity), 1, timeout=settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(identity):
+    return cache.get(pin_key(identity)) is not None
+
+
+async def ais_pinned(identity):
+    return await cache.aget(pin_key(identity)) is not None
+
+
+@contextmanager
+def replica_reads():
+    """
+    Allow reads in this context to go to a replica. The replica is chosen
+    on the first read and kept for the rest of the context, so one
+    request never mixes snapshots of two replicas.
+    """
+    token = _replica_reads.set({'alias': None})
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Send reads in this context to the primary, even inside a request that
+    may use replicas; e.g. when the result outlives the request in a cache.
+    """
+    token = _replica_reads.set(None)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def current_replica():
+    """
+    The replica this context's reads went to, if any.
+    """
+    state = _replica_reads.get()
+    if state is None or state['alias'] == DEFAULT_DB_ALIAS:
+        return None
+    return state['alias']
+
+
+class ReplicaRouter:
+    """
+    Sends reads to a healthy replica from `DATABASE_REPLICAS` inside
+    `replica_reads()` (safe requests without a primary pin), and
+    everything else to the primary. Writes, reads inside a transaction on
+    the primary and reads outside requests always use the primary.
+
+    Locally, SQLite files can stand in for the databases: point `default`
+    and a `replica_0` alias at two files (copy the migrated primary to the
+    replica) and set `DATABASE_REPLICAS = ['replica_0']`.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _replica_reads.get()
+        if state is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state['alias'] is None:
+            healthy = [alias for alias in settings.DATABASE_REPLICAS if replica_is_healthy(alias)]
+            state['alias'] = random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+        return state['alias']
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
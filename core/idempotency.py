@@ -0,0 +1,93 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from .cache import lock_token, release_lock
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is already being processed.'
+    default_code = 'idempotency_conflict'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used with a different request body.'
+    default_code = 'idempotency_key_reused'
+
+
+class IdempotentCreateMixin:
+    """
+    Makes `create` safe to retry when the client sends an `Idempotency-Key`.
+
+    The first response (anything but a 5xx, including errors raised as API
+    exceptions) is stored in the cache per user and key and replayed for later requests with the same key and body.
+    A short lock rejects duplicates that arrive while the first one is
+    still running.
+    """
+    idempotency_ttl = 24 * 60 * 60  # 24 hours
+    idempotency_lock_timeout = 30
+    idempotency_max_key_length = 255
+
+    def get_idempotency_cache_key(self, request, key):
+        user_id = request.user.pk if request.user.is_authenticated else 'anon'
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return f'idempotency:{self.basename}:{user_id}:{digest}'
+
+    def replay(self, stored):
+        headers = dict(stored['headers'])
+        headers[REPLAYED_HEADER] = 'true'
+        return Response(stored['data'], status=stored['status'], headers=headers)
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > self.idempotency_max_key_length:
+            raise ValidationError({IDEMPOTENCY_HEADER: 'Key is too long.'})
+
+        cache_key = self.get_idempotency_cache_key(request, key)
+        fingerprint = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+
+        stored = cache.get(cache_key)
+        if stored is None:
+            lock_key = f'{cache_key}:lock'
+            token = lock_token()
+            if not cache.add(lock_key, token, timeout=self.idempotency_lock_timeout):
+                raise IdempotencyConflict()
+            try:
+                # The first request may have finished between the get and the lock.
+                stored = cache.get(cache_key)
+                if stored is None:
+                    try:
+                        response = super().create(request, *args, **kwargs)
+                    except Exception as exc:
+                        # Rejections such as validation errors are raised,
+                        # not returned; store their responses too.
+                        response = self.handle_exception(exc)
+                    if response.status_code < 500:
+                        cache.set(cache_key, {
+                            'fingerprint': fingerprint,
+                            'status': response.status_code,
+                            'data': response.data,
+                            'headers': {
+                                name: response[name] for name in ('Location',) if response.has_header(name)
+                            },
+                        }, timeout=self.idempotency_ttl)
+                    return response
+            finally:
+                release_lock(lock_key, token)
+
+        if stored['fingerprint'] != fingerprint:
+            raise IdempotencyKeyReused()
+        return self.replay(stored)
@@ -0,0 +1,74 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def load(path):
+    try:
+        with open(path) as results_file:
+            return json.load(results_file)
+    except (OSError, ValueError) as e:
+        raise CommandError(f'Cannot read {path}: {e}')
+
+
+def compare(base, head, time_threshold, throughput_threshold):
+    """
+    Yield `(name, metric, base value, head value, regressed)` for every
+    metric the two runs share. More queries is always a regression; timings
+    and throughput only beyond their relative thresholds.
+    """
+    for name in sorted(set(base) & set(head)):
+        for metric, base_value in sorted(base[name].items()):
+            head_value = head[name].get(metric)
+            if head_value is None:
+                continue
+            if metric == 'queries':
+                regressed = head_value > base_value
+            elif metric.endswith('_ms'):
+                regressed = head_value > base_value * (1 + time_threshold)
+            elif metric == 'objects_per_second':
+                regressed = head_value < base_value * (1 - throughput_threshold)
+            else:
+                regressed = False
+            yield name, metric, base_value, head_value, regressed
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare two run_benchmarks result files and fail when the second one "
+        "regressed: more queries, or slower beyond the thresholds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base', help='Results of the baseline commit')
+        parser.add_argument('head', help='Results of the commit under test')
+        parser.add_argument(
+            '--time-threshold', type=float, default=0.2,
+            help='Allowed relative slowdown of timings (default 0.2 = 20%%)',
+        )
+        parser.add_argument(
+            '--throughput-threshold', type=float, default=0.1,
+            help='Allowed relative drop in throughput (default 0.1 = 10%%)',
+        )
+
+    def handle(self, *args, **options):
+        base, head = load(options['base']), load(options['head'])
+        if base['meta'].get('dataset') != head['meta'].get('dataset'):
+            self.stderr.write(self.style.WARNING('The runs used different datasets; timings are not comparable.'))
+
+        regressions = []
+        for name, metric, base_value, head_value, regressed in compare(
+            base['results'], head['results'], options['time_threshold'], options['throughput_threshold'],
+        ):
+            change = f'{(head_value - base_value) / base_value:+.1%}' if base_value else ''
+            line = f'{name:<40} {metric:<20} {base_value:>12} {head_value:>12} {change:>8}'
+            if regressed:
+                regressions.append(f'{name} {metric}')
+                line = self.style.ERROR(line + '  REGRESSION')
+            self.stdout.write(line)
+
+        for name in sorted(set(base['results']) ^ set(head['results'])):
+            self.stdout.write(f"{name:<40} only in {'base' if name in base['results'] else 'head'}")
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s): {', '.join(regressions)}")
@@ -0,0 +1,187 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from core.cache import bump_generation
+from core.renderers import ORJSONRenderer
+from orders.models import Order
+from orders.queries import orders_for_serializer
+from orders.serializers import OrderSerializer
+from products.cache import PRODUCT_CACHE_NAMESPACE
+from products.models import Category, Product
+from products.queries import product_rows, products_for_serializer
+from products.serializers import ProductRowSerializer, ProductSerializer
+from users.models import User
+from .seed_benchmark_data import BENCHMARK_USER_PREFIX
+
+
+class Command(BaseCommand):
+    help = (
+        "Run serializer and endpoint micro-benchmarks against the current database "
+        "(see seed_benchmark_data) and print the results as JSON for compare_benchmarks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement')
+        parser.add_argument('--objects', type=int, default=1000, help='Products per serializer batch')
+        parser.add_argument('--output', help='Write the results to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if not Product.objects.exists():
+            raise CommandError('No products; run seed_benchmark_data first.')
+        self.repeat = options['repeat']
+        self.requests = 0
+
+        results = {}
+        results.update(self.serializer_benchmarks(options['objects']))
+        results.update(self.endpoint_benchmarks())
+        report = {'meta': self.metadata(), 'results': results}
+
+        output = json.dumps(report, indent=2, sort_keys=True) + '\n'
+        if options['output']:
+            with open(options['output'], 'w') as results_file:
+                results_file.write(output)
+            self.stderr.write(f"Wrote {len(results)} benchmarks to {options['output']}.")
+        else:
+            self.stdout.write(output, ending='')
+
+    def metadata(self):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'dataset': {
+                'categories': Category.objects.count(),
+                'products': Product.objects.count(),
+                'orders': Order.objects.count(),
+            },
+            'repeat': self.repeat,
+        }
+
+    def timed(self, function):
+        """
+        Seconds per call of `function`, best and median over `repeat` runs.
+        """
+        durations = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            function()
+            durations.append(time.perf_counter() - start)
+        return min(durations), statistics.median(durations)
+
+    def serializer_benchmarks(self, count):
+        products = list(products_for_serializer().order_by('id')[:count])
+        rows = list(product_rows().order_by('id')[:count])
+        orders = list(orders_for_serializer(Order.objects.order_by('id'))[:max(1, count // 10)])
+        renderer, fast_renderer = JSONRenderer(), ORJSONRenderer()
+        cases = {
+            'serializer.product': (products, lambda: ProductSerializer(products, many=True).data),
+            'serializer.product.render': (
+                products, lambda: renderer.render(ProductSerializer(products, many=True).data)
+            ),
+            # The list endpoints' path: rows, ProductRowSerializer, orjson.
+            'serializer.product_rows': (rows, lambda: ProductRowSerializer(rows, many=True).data),
+            'serializer.product_rows.render': (
+                rows, lambda: fast_renderer.render(ProductRowSerializer(rows, many=True).data)
+            ),
+            'serializer.order': (orders, lambda: OrderSerializer(orders, many=True).data),
+        }
+        results = {}
+        for name, (objects, function) in cases.items():
+            if not objects:
+                continue
+            best, median = self.timed(function)
+            results[name] = {
+                'objects': len(objects),
+                'objects_per_second': round(len(objects) / best),
+                'median_ms': round(median * 1000, 3),
+            }
+        return results
+
+    def endpoint_benchmarks(self):
+        product = Product.objects.order_by('id').first()
+        customer = (
+            User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX, orders__isnull=False)
+            .order_by('username').first()
+        )
+        word = product.name.split()[0].lower()
+        # Page 50, or the last page of a smaller catalogue.
+        deep_page = max(1, min(50, -(-Product.objects.count() // api_settings.PAGE_SIZE)))
+        products_url = reverse('api:product-list')
+        cases = {
+            'endpoint.products.list': (products_url, {}, None),
+            'endpoint.products.list.deep_page': (products_url, {'page': deep_page}, None),
+            'endpoint.products.list.cursor': (products_url, {'pagination': 'cursor', 'ordering': 'price'}, None),
+            'endpoint.products.filter.category': (products_url, {'category': product.category_id}, None),
+            'endpoint.products.search': (products_url, {'search': word}, None),
+            'endpoint.products.detail': (reverse('api:product-detail', args=[product.pk]), {}, None),
+            'endpoint.categories.list': (reverse('api:category-list'), {}, None),
+        }
+        if customer is not None:
+            order = customer.orders.order_by('id').first()
+            cases['endpoint.orders.list'] = (reverse('api:order-list'), {}, customer)
+            cases['endpoint.orders.detail'] = (reverse('api:order-detail', args=[order.pk]), {}, customer)
+
+        results = {}
+        for name, (url, params, user) in cases.items():
+            results[name] = self.measure_endpoint(url, params, user, cached=False)
+        results['endpoint.products.list.cached'] = self.measure_endpoint(products_url, {}, None, cached=True)
+        return results
+
+    def measure_endpoint(self, url, params, user, cached):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+
+        def request():
+            if not cached:
+                # A new generation makes every cached product response a miss.
+                bump_generation(PRODUCT_CACHE_NAMESPACE)
+            # A fresh address per request keeps the anonymous rate limit
+            # out of the way while still paying for its check.
+            self.requests += 1
+            address = f'10.{self.requests >> 16 & 255}.{self.requests >> 8 & 255}.{self.requests & 255}'
+            return client.get(url, params, REMOTE_ADDR=address)
+
+        response = request()  # Warm up (and fill the cache for `cached`)
+        if response.status_code != 200:
+            raise CommandError(f'GET {url} {params} returned {response.status_code}.')
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        # Not CaptureQueriesContext: request_started empties the query log
+        # it reads, mid-request.
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(count_query))
+            request()
+        best, median = self.timed(request)
+        return {
+            'queries': queries,
+            'best_ms': round(best * 1000, 3),
+            'median_ms': round(median * 1000, 3),
+        }
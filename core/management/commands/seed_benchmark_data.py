@@ -0,0 +1,234 @@
+import csv
+import io
+import random
+from array import array
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from orders.models import Order, OrderItem
+from products.cache import invalidate_product_cache
+from products.models import Category, Product
+from users.models import User
+
+BENCHMARK_USER_PREFIX = 'bench_user_'
+BENCHMARK_PASSWORD = 'benchmark'
+# Fixed clock so timestamps (and keyset pages) are the same on every run.
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+YEAR_SECONDS = 365 * 24 * 60 * 60
+
+ADJECTIVES = [
+    'wireless', 'organic', 'vintage', 'compact', 'premium', 'portable', 'ergonomic', 'waterproof',
+    'handmade', 'smart', 'classic', 'lightweight', 'durable', 'rechargeable', 'stainless', 'modular',
+]
+NOUNS = [
+    'headphones', 'backpack', 'keyboard', 'lamp', 'kettle', 'camera', 'blender', 'jacket',
+    'speaker', 'notebook', 'bottle', 'monitor', 'chair', 'watch', 'tent', 'charger', 'novel', 'puzzle',
+]
+MATERIALS = ['steel', 'bamboo', 'leather', 'cotton', 'aluminium', 'glass', 'oak', 'recycled plastic']
+STATUS_WEIGHTS = [('COMPLETED', 80), ('PENDING', 8), ('PROCESSING', 2), ('CANCELLED', 10)]
+
+
+# COPY's CSV format reads an unquoted empty field as NULL, which would turn
+# '' (e.g. Order.failure_reason) into a NOT NULL violation; mark NULLs
+# explicitly instead.
+COPY_NULL = r'\N'
+
+
+def copy_buffer(rows):
+    """
+    `rows` as CSV for `COPY ... WITH (FORMAT csv, NULL '\\N')`.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [COPY_NULL if value is None else value for value in row] for row in rows
+    )
+    buffer.seek(0)
+    return buffer
+
+
+def benchmark_username(index):
+    return f'{BENCHMARK_USER_PREFIX}{index:07d}'
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic catalogue, users and order history for benchmarks. "
+        "The same --seed and sizes always produce the same rows and ids."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--orders', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--flush', action='store_true',
+            help='Delete all orders, products, categories and benchmark users first.',
+        )
+
+    def handle(self, *args, **options):
+        if options['products'] < 1 or options['categories'] < 1:
+            raise CommandError('Need at least one product and one category.')
+        if options['orders'] and options['users'] < 1:
+            raise CommandError('Orders need at least one user.')
+        self.batch_size = options['batch_size']
+        rng = random.Random(options['seed'])
+
+        if options['flush']:
+            self.flush()
+        elif Order.objects.exists() or Product.objects.exists() or Category.objects.exists():
+            raise CommandError('The catalogue is not empty; pass --flush to replace it.')
+
+        with transaction.atomic():
+            self.insert(Category, ['id', 'name', 'description'], (
+                (index, f'Category {index}', f'Benchmark category {index}.')
+                for index in range(1, options['categories'] + 1)
+            ))
+            # Prices in cents, to price order lines without keeping a
+            # million Product objects around.
+            prices = array('q')
+            self.insert(Product, [
+                'id', 'name', 'description', 'price', 'stock', 'inventory_mode',
+                'category_id', 'created_at', 'updated_at',
+            ], self.product_rows(rng, options['products'], options['categories'], prices))
+            self.stdout.write(f"Inserted {options['categories']} categories and {options['products']} products.")
+
+            user_ids = self.create_users(options['users'])
+            self.stdout.write(f"Inserted {len(user_ids)} users (password '{BENCHMARK_PASSWORD}').")
+
+            item_count = 0
+            for batch in batched(self.orders(rng, options['orders'], user_ids, prices), self.batch_size):
+                self.insert(Order, [
+                    'id', 'user_id', 'total_price', 'status', 'failure_reason', 'created_at', 'updated_at',
+                ], [order for order, _ in batch])
+                items = []
+                for order, lines in batch:
+                    for product_id, quantity, price in lines:
+                        item_count += 1
+                        items.append((item_count, order[0], product_id, quantity, price))
+                self.insert(OrderItem, ['id', 'order_id', 'product_id', 'quantity', 'price'], items)
+            self.stdout.write(f"Inserted {options['orders']} orders with {item_count} items.")
+
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [Category, Product, Order, OrderItem]):
+                    cursor.execute(sql)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for model in (Category, Product, User, Order, OrderItem):
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+        invalidate_product_cache()
+
+    def flush(self):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Row-by-row cascading deletes would take hours at a million products.
+                tables = ', '.join(
+                    connection.ops.quote_name(model._meta.db_table)
+                    for model in (OrderItem, Order, Product, Category)
+                )
+                with connection.cursor() as cursor:
+                    cursor.execute(f'TRUNCATE {tables}')
+            else:
+                OrderItem.objects.all().delete()
+                Order.objects.all().delete()
+                Product.objects.all().delete()
+                Category.objects.all().delete()
+            User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX).delete()
+
+    def product_rows(self, rng, count, categories, prices):
+        for index in range(1, count + 1):
+            adjective, noun, material = rng.choice(ADJECTIVES), rng.choice(NOUNS), rng.choice(MATERIALS)
+            cents = rng.randint(199, 99999)
+            prices.append(cents)
+            created_at = EPOCH + timedelta(seconds=rng.randrange(YEAR_SECONDS))
+            yield (
+                index,
+                f'{adjective.capitalize()} {noun} {index}',
+                f'A {adjective} {noun} made of {material}. Item {index} of the benchmark catalogue.',
+                Decimal(cents).scaleb(-2),
+                rng.randint(0, 500),
+                'DATABASE',
+                rng.randint(1, categories),
+                created_at,
+                created_at,
+            )
+
+    def create_users(self, count):
+        password = make_password(BENCHMARK_PASSWORD)  # Hashed once, not per user
+        users = (
+            User(
+                username=benchmark_username(index),
+                email=f'{benchmark_username(index)}@example.com',
+                password=password,
+            )
+            for index in range(1, count + 1)
+        )
+        for batch in batched(users, self.batch_size):
+            User.objects.bulk_create(batch)
+        return list(
+            User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX)
+            .order_by('username').values_list('id', flat=True)
+        )
+
+    def orders(self, rng, count, user_ids, prices):
+        """
+        Yield `(order row, [(product_id, quantity, price), ...])`.
+        """
+        statuses, weights = zip(*STATUS_WEIGHTS)
+        for order_id in range(1, count + 1):
+            quantities = {}
+            for _ in range(rng.randint(1, 5)):
+                product_id = rng.randint(1, len(prices))
+                quantities[product_id] = quantities.get(product_id, 0) + rng.randint(1, 3)
+            lines = [
+                (product_id, quantity, Decimal(prices[product_id - 1] * quantity).scaleb(-2))
+                for product_id, quantity in quantities.items()
+            ]
+            created_at = EPOCH + timedelta(seconds=rng.randrange(YEAR_SECONDS))
+            status = rng.choices(statuses, weights)[0]
+            order = (
+                order_id, rng.choice(user_ids), sum(price for _, _, price in lines), status,
+                'Insufficient stock.' if status == 'CANCELLED' else '', created_at, created_at,
+            )
+            yield order, lines
+
+    def insert(self, model, fields, rows):
+        """
+        Insert raw rows (`fields` order) in batches: COPY on PostgreSQL,
+        multi-row INSERTs elsewhere. Bypasses save(), signals and auto_now.
+        """
+        model_fields = [model._meta.get_field(name) for name in fields]
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in model_fields)
+        with connection.cursor() as cursor:
+            for batch in batched(rows, self.batch_size):
+                prepared = [
+                    [field.get_db_prep_save(value, connection) for field, value in zip(model_fields, row)]
+                    for row in batch
+                ]
+                if connection.vendor == 'postgresql':
+                    cursor.copy_expert(
+                        f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                        copy_buffer(prepared),
+                    )
+                else:
+                    placeholders = ', '.join(['%s'] * len(fields))
+                    cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', prepared)
@@ -0,0 +1,180 @@
+"""
+Application metrics, exported by django-prometheus at /metrics.
+
+Request latency per route comes from django-prometheus' middleware; this
+module adds per-request database work, response-cache and per-tier cache
+hits, throttling, order outcomes and Celery task metrics. With
+`PROMETHEUS_MULTIPROC_DIR` set, every Gunicorn worker and Celery child
+writes its samples there and the exporters aggregate them (see gunicorn.conf.py and `start_worker_exporter`).
+"""
+import os
+import shutil
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from celery import signals as celery_signals
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from prometheus_client import CollectorRegistry, Counter, Histogram, multiprocess, start_http_server
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+REQUEST_DB_QUERIES = Histogram(
+    'ecomapp_request_db_queries', 'Database queries run while handling a request.',
+    ['view'], buckets=QUERY_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    'ecomapp_request_db_seconds', 'Time spent in database queries per request.',
+    ['view'], buckets=DB_TIME_BUCKETS,
+)
+RESPONSE_CACHE = Counter(
+    'ecomapp_response_cache_requests_total', 'Cached-response lookups by result (hit/stale/miss/not_modified).',
+    ['namespace', 'result'],
+)
+CACHE_REQUESTS = Counter(
+    'ecomapp_cache_requests_total', 'Two-tier cache lookups by tier (l1/l2) and result (hit/miss).',
+    ['tier', 'result'],
+)
+THROTTLED_REQUESTS = Counter(
+    'ecomapp_throttled_requests_total', 'Requests rejected by a throttle.', ['scope'],
+)
+ORDERS = Counter(
+    'ecomapp_orders_total', 'Order creation outcomes.', ['mode', 'outcome'],
+)
+CELERY_TASK_SECONDS = Histogram(
+    'ecomapp_celery_task_seconds', 'Celery task run time.', ['task', 'state'], buckets=TASK_BUCKETS,
+)
+CELERY_TASK_QUEUE_LAG = Histogram(
+    'ecomapp_celery_task_queue_lag_seconds', 'Time between publishing a task and a worker starting it.',
+    ['task'], buckets=TASK_BUCKETS,
+)
+CELERY_TASK_RETRIES = Counter(
+    'ecomapp_celery_task_retries_total', 'Celery task retries.', ['task'],
+)
+
+# Queries and time of the request being handled, when one is.
+_request_queries = ContextVar('request_queries', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _request_queries.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats['queries'] += 1
+        stats['seconds'] += time.perf_counter() - start
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class QueryMetricsMiddleware:
+    """
+    Observes how many queries each request ran, and for how long, per route.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = {'queries': 0, 'seconds': 0.0}
+        token = _request_queries.set(stats)
+        try:
+            return self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+            self.observe(request, stats)
+
+    async def __acall__(self, request):
+        stats = {'queries': 0, 'seconds': 0.0}
+        token = _request_queries.set(stats)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+            self.observe(request, stats)
+
+    def observe(self, request, stats):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match is not None else '<unresolved>'
+        REQUEST_DB_QUERIES.labels(view).observe(stats['queries'])
+        REQUEST_DB_SECONDS.labels(view).observe(stats['seconds'])
+
+
+@celery_signals.before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault('published_at', time.time())
+
+
+@celery_signals.task_prerun.connect
+def start_task_timer(task=None, **kwargs):
+    task.request._metrics_started = time.perf_counter()
+    published_at = getattr(task.request, 'published_at', None)
+    if published_at is None:
+        published_at = (getattr(task.request, 'headers', None) or {}).get('published_at')
+    if published_at is not None:
+        CELERY_TASK_QUEUE_LAG.labels(task.name).observe(max(0, time.time() - float(published_at)))
+
+
+@celery_signals.task_postrun.connect
+def observe_task(task=None, state=None, **kwargs):
+    started = getattr(task.request, '_metrics_started', None)
+    if started is not None:
+        CELERY_TASK_SECONDS.labels(task.name, state or 'UNKNOWN').observe(time.perf_counter() - started)
+
+
+@celery_signals.task_retry.connect
+def count_retry(sender=None, **kwargs):
+    CELERY_TASK_RETRIES.labels(sender.name).inc()
+
+
+def reset_multiprocess_dir():
+    """
+    Clear samples left by processes of a previous run. Call once, before
+    any worker starts.
+    """
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def mark_process_dead(pid):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
+
+
+@celery_signals.worker_init.connect
+def start_worker_exporter(**kwargs):
+    """
+    Serve the Celery pool's aggregated metrics on CELERY_METRICS_PORT.
+    """
+    port = os.environ.get('CELERY_METRICS_PORT')
+    if not port or not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return
+    reset_multiprocess_dir()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(int(port), registry=registry)
+
+
+@celery_signals.worker_process_shutdown.connect
+def mark_worker_process_dead(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
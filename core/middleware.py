@@ -0,0 +1,84 @@
+import jwt
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .db_router import (
+    ais_pinned, apin_to_primary, current_replica, is_pinned, mark_replica_down,
+    pin_to_primary, replica_reads,
+)
+
+
+def client_identity(request):
+    """
+    Who is making the request, for read-your-writes pinning only.
+
+    The JWT is decoded without verifying it: authentication happens later
+    in the view, and a forged token can at most send reads to the primary.
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme in jwt_settings.AUTH_HEADER_TYPES and token:
+        try:
+            claims = jwt.decode(token, options={'verify_signature': False})
+        except jwt.PyJWTError:
+            return None
+        user_id = claims.get(jwt_settings.USER_ID_CLAIM)
+        return None if user_id is None else f'user:{user_id}'
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key:
+        return f'session:{session_key}'
+    return None
+
+
+def wrote(request, response):
+    return request.method not in SAFE_METHODS and response.status_code < 400
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe requests read from a replica (see core.db_router).
+
+    After a successful unsafe request, the client's reads stay on the
+    primary for `DATABASE_REPLICA_STICKY_SECONDS`. A replica that raises a
+    database error is taken out of rotation until its next health check.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        identity = client_identity(request)
+        if request.method in SAFE_METHODS and not (identity and is_pinned(identity)):
+            with replica_reads():
+                return self.get_response(request)
+
+        response = self.get_response(request)
+        if identity and wrote(request, response):
+            pin_to_primary(identity)
+        return response
+
+    async def __acall__(self, request):
+        identity = client_identity(request)
+        if request.method in SAFE_METHODS and not (identity and await ais_pinned(identity)):
+            with replica_reads():
+                return await self.get_response(request)
+
+        response = await self.get_response(request)
+        if identity and wrote(request, response):
+            await apin_to_primary(identity)
+        return response
+
+    def process_exception(self, request, exception):
+        alias = current_replica()
+        if alias is not None and isinstance(exception, DatabaseError):
+            mark_replica_down(alias)
+        return None
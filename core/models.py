@@ -6,3 +6,22 @@ class Tag(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class OutboxEvent(models.Model):
+    """
+    An event written in the same transaction as the change it describes and
+    published to Celery afterwards by `core.outbox.dispatch_outbox`.
+    """
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], name='outbox_unsent_idx', condition=models.Q(sent_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.id}"
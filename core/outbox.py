@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+BATCH_SIZE = 500
+RETENTION = timedelta(days=7)
+
+
+def publish(topic, **payload):
+    """
+    Record an event for `topic`; call inside the transaction that makes the
+    change, so the event exists if and only if the change committed.
+    """
+    if topic not in settings.OUTBOX_HANDLERS:
+        raise ValueError(f"No outbox handler configured for topic {topic!r}")
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def dispatch_outbox(batch_size=BATCH_SIZE):
+    """
+    Publish pending events to their Celery tasks and mark them sent.
+
+    Events are claimed with SKIP LOCKED, so several dispatchers never send
+    the same batch, and published over one broker connection. Delivery is
+    at-least-once: if marking fails after publishing, the batch is sent
+    again, so handlers must be idempotent.
+    """
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(sent_at__isnull=True)
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        with current_app.producer_or_acquire() as producer:
+            for event in events:
+                current_app.send_task(
+                    settings.OUTBOX_HANDLERS[event.topic], kwargs=event.payload, producer=producer
+                )
+        OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(sent_at=timezone.now())
+    return len(events)
+
+
+def purge_outbox(older_than=RETENTION):
+    cutoff = timezone.now() - older_than
+    deleted, _ = OutboxEvent.objects.filter(sent_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,210 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination on (<ordering field>, id).
+
+    Pages are fetched with `WHERE (field, id) > (last_field, last_id)` so
+    deep pages cost the same as the first one, and no COUNT query is run.
+    The ordering comes from the view's ordering filter when its first field
+    is listed in `keyset_fields`, otherwise from `default_ordering`; models
+    without the field (e.g. Category has no `created_at`) seek on `id`.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    keyset_fields = ('created_at', 'price')
+    default_ordering = 'created_at'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.seek(queryset, request, view)
+        return self.set_page(list(queryset[:self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.seek(queryset, request, view)
+        return self.set_page([item async for item in queryset[:self.page_size + 1]])
+
+    def seek(self, queryset, request, view):
+        """
+        Order and filter `queryset` past the request's cursor.
+        """
+        self.request = request
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+        model_field = queryset.model._meta.get_field(self.field)
+        cursor = self.decode_cursor(request, model_field)
+
+        self.reverse = bool(cursor and cursor['reverse'])
+        self.has_cursor = cursor is not None
+        # Walking backwards is the same seek with the ordering flipped.
+        descending = self.descending != self.reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')
+
+        if cursor is not None:
+            value, pk = cursor['position']
+            op = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{op}': value})
+                | Q(**{self.field: value, f'id__{op}': pk})
+            )
+        return queryset
+
+    def set_page(self, results):
+        """
+        Take the page out of `page_size + 1` fetched rows.
+        """
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.has_cursor
+
+        self.page = results
+        return results
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        ordering_filters = [
+            backend for backend in getattr(view, 'filter_backends', [])
+            if hasattr(backend, 'get_ordering')
+        ]
+        if ordering_filters:
+            ordering = ordering_filters[0]().get_ordering(request, queryset, view)
+        elif getattr(view, 'ordering', None):
+            ordering = view.ordering
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        first = ordering[0] if ordering else self.default_ordering
+        if first.lstrip('-') not in self.keyset_fields:
+            first = self.default_ordering
+        if not self.has_field(queryset.model, first.lstrip('-')):
+            first = 'id'
+        return first.lstrip('-'), first.startswith('-')
+
+    def has_field(self, model, name):
+        try:
+            model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    def decode_cursor(self, request, model_field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            value, pk = payload['p']
+            return {
+                'position': (model_field.to_python(value), int(pk)),
+                'reverse': bool(payload.get('r')),
+            }
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, item, reverse):
+        # Pages hold model instances or `.values()` rows.
+        if isinstance(item, dict):
+            value, pk = item[self.field], item['id']
+        else:
+            value, pk = getattr(item, self.field), item.pk
+        value = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        payload = json.dumps({'p': [value, pk], 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii').rstrip('=')
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class HybridPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; clients opt into keyset pagination
+    per request with `?pagination=cursor` or by following a `cursor` link.
+    """
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        `paginate_queryset` for async views, using the async ORM.
+        """
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        # Paginate the row numbers, then fetch just the page's rows.
+        paginator = self.django_paginator_class(range(await queryset.acount()), page_size)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        offset = (self.page.number - 1) * paginator.per_page
+        self.page.object_list = [item async for item in queryset[offset:offset + paginator.per_page]]
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
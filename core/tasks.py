@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from . import outbox
+
+
+@shared_task
+def dispatch_outbox():
+    return outbox.dispatch_outbox()
+
+
+@shared_task
+def purge_outbox():
+    return outbox.purge_outbox()
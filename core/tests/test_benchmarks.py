@@ -0,0 +1,74 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from core.management.commands.seed_benchmark_data import copy_buffer
+from orders.models import Order, OrderItem
+from products.models import Product
+
+
+def seed(**options):
+    call_command(
+        'seed_benchmark_data', products=200, categories=5, users=10, orders=50, stdout=StringIO(), **options
+    )
+
+
+class BenchmarkCommandsTest(TestCase):
+    def snapshot(self):
+        return (
+            list(Product.objects.order_by('id').values_list('id', 'name', 'price', 'category_id', 'created_at')),
+            list(OrderItem.objects.order_by('id').values_list('order__user__username', 'product_id', 'quantity')),
+        )
+
+    def test_seed_is_deterministic(self):
+        seed()
+        first = self.snapshot()
+        self.assertEqual(len(first[0]), 200)
+        self.assertEqual(Order.objects.count(), 50)
+
+        with self.assertRaises(CommandError):
+            seed()  # Refuses to mix with existing data
+        seed(flush=True)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_run_and_compare(self):
+        seed()
+        output = StringIO()
+        call_command('run_benchmarks', repeat=1, objects=50, stdout=output)
+        report = json.loads(output.getvalue())
+        self.assertEqual(report['meta']['dataset']['products'], 200)
+        self.assertGreater(report['results']['serializer.product']['objects_per_second'], 0)
+        self.assertGreater(report['results']['endpoint.products.list']['queries'], 0)
+        self.assertEqual(report['results']['endpoint.products.list.cached']['queries'], 0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            base, head = os.path.join(directory, 'base.json'), os.path.join(directory, 'head.json')
+            with open(base, 'w') as base_file:
+                json.dump(report, base_file)
+            call_command('compare_benchmarks', base, base, stdout=StringIO())
+
+            report['results']['endpoint.products.detail']['queries'] += 1
+            with open(head, 'w') as head_file:
+                json.dump(report, head_file)
+            with self.assertRaisesMessage(CommandError, 'endpoint.products.detail queries'):
+                call_command('compare_benchmarks', base, head, stdout=StringIO())
+
+
+class CopyBufferTest(SimpleTestCase):
+    def test_empty_strings_are_not_nulls(self):
+        rows = list(csv.reader(copy_buffer([[1, '', None, 'a,b']])))
+        self.assertEqual(rows, [['1', '', '\\N', 'a,b']])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'COPY requires PostgreSQL')
+class PostgresSeedTest(TestCase):
+    def test_copy_keeps_empty_strings(self):
+        seed()
+        self.assertEqual(Order.objects.count(), 50)
+        self.assertTrue(Order.objects.exclude(status='CANCELLED').filter(failure_reason='').exists())
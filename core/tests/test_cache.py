@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+import fakeredis
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core import cache as core_cache
+from core.cache import (
+    acached_value, cached_value, entry_state, lock_key, lock_token, make_entry, release_lock,
+)
+
+
+class CachedValueTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f'value {self.calls}'
+
+    def test_miss_then_hit(self):
+        self.assertEqual(cached_value('k', 1, self.compute), ('value 1', 'miss'))
+        self.assertEqual(cached_value('k', 1, self.compute), ('value 1', 'hit'))
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_entry_is_served_while_another_worker_recomputes(self):
+        cached_value('k', 1, self.compute)
+        cache.add(lock_key('k'), 'other worker')
+        self.assertEqual(cached_value('k', 2, self.compute), ('value 1', 'stale'))
+        self.assertEqual(self.calls, 1)
+
+        cache.delete(lock_key('k'))
+        self.assertEqual(cached_value('k', 2, self.compute), ('value 2', 'miss'))
+
+    def test_expired_entry_is_recomputed(self):
+        cache.set('k', make_entry('old', 1, timeout=-1, delta=0))
+        self.assertEqual(cached_value('k', 1, self.compute), ('value 1', 'miss'))
+
+    def test_early_recomputation_near_expiry(self):
+        entry = make_entry('value', 1, timeout=5, delta=1)
+        with mock.patch('core.cache.random.random', return_value=0.999):  # -log(0.001) ~ 6.9 deltas
+            self.assertEqual(entry_state(entry, 1), 'early')
+        with mock.patch('core.cache.random.random', return_value=0.5):
+            self.assertEqual(entry_state(entry, 1), 'fresh')
+
+    def test_concurrent_calls_in_a_process_compute_once(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_compute():
+            started.set()
+            release.wait(5)
+            return self.compute()
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cached_value('k', 1, slow_compute)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(cached_value('k', 1, self.compute)))
+        follower.start()
+        time.sleep(0.1)
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(self.calls, 1)
+        self.assertCountEqual(results, [('value 1', 'miss'), ('value 1', 'hit')])
+
+    def test_async_calls_are_coalesced(self):
+        async def compute():
+            await asyncio.sleep(0.05)
+            return self.compute()
+
+        async def run():
+            return await asyncio.gather(*(acached_value('k', 1, compute) for _ in range(3)))
+
+        results = asyncio.run(run())
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(sorted(result for _, result in results), ['hit', 'hit', 'miss'])
+
+
+class BumpGenerationTest(SimpleTestCase):
+    def test_generations_are_bump_times_a_second_apart(self):
+        redis = fakeredis.FakeStrictRedis()
+        with mock.patch.object(core_cache, 'get_redis_connection', return_value=redis):
+            before = time.time() * 1000
+            first = core_cache.bump_generation('things')
+            second = core_cache.bump_generation('things')
+        self.assertGreaterEqual(first, before - 1000)
+        self.assertEqual(second, first + 1000)
+        self.assertEqual(int(redis.get(cache.make_key(core_cache.generation_key('things')))), second)
+
+
+class ReleaseLockTest(SimpleTestCase):
+    def test_only_the_holder_releases_the_lock(self):
+        redis = fakeredis.FakeStrictRedis()
+        mine, theirs = lock_token(), lock_token()
+        # As django_redis stores an int: its digits.
+        redis.set(cache.make_key('k:lock'), theirs)
+        with mock.patch.object(core_cache, 'get_redis_connection', return_value=redis):
+            release_lock('k:lock', mine)
+            self.assertEqual(int(redis.get(cache.make_key('k:lock'))), theirs)
+            release_lock('k:lock', theirs)
+        self.assertIsNone(redis.get(cache.make_key('k:lock')))
@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from asgiref.sync import async_to_sync
+from core import db_router
+from core.cache import acached_value, cached_value
+from core.db_router import ReplicaRouter
+from core.middleware import ReplicaRoutingMiddleware
+from products.models import Product
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1'], DATABASE_REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        db_router._replica_health.clear()
+        patcher = mock.patch.object(db_router, 'check_replica', return_value=True)
+        self.check_replica = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+        token = AccessToken.for_user(User(id=7, username='reader'))
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def read_database(self, request, status=200):
+        """
+        Run `request` through the middleware; return where a read went.
+        """
+        seen = []
+
+        def view(request):
+            seen.append(ReplicaRouter().db_for_read(Product))
+            seen.append(ReplicaRouter().db_for_read(Product))
+            return HttpResponse(status=status)
+
+        ReplicaRoutingMiddleware(view)(request)
+        self.assertEqual(seen[0], seen[1])  # One database per request
+        return seen[0]
+
+    def test_safe_requests_read_from_a_replica(self):
+        self.assertIn(self.read_database(self.factory.get('/api/products/')), {'replica_0', 'replica_1'})
+        self.assertEqual(self.read_database(self.factory.post('/api/orders/')), 'default')
+
+    def test_cache_recomputes_read_from_primary(self):
+        async def acompute():
+            return ReplicaRouter().db_for_read(Product)
+
+        with db_router.replica_reads():
+            self.assertNotEqual(ReplicaRouter().db_for_read(Product), 'default')
+            value, _ = cached_value('replica-test', 1, lambda: ReplicaRouter().db_for_read(Product))
+            self.assertEqual(value, 'default')
+            value, _ = async_to_sync(acached_value)('replica-test-async', 1, acompute)
+            self.assertEqual(value, 'default')
+            self.assertNotEqual(ReplicaRouter().db_for_read(Product), 'default')
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Product), 'default')
+        self.assertEqual(ReplicaRouter().db_for_write(Product), 'default')
+
+    def test_writer_sticks_to_primary(self):
+        self.read_database(self.factory.post('/api/orders/', **self.auth), status=201)
+        self.assertEqual(self.read_database(self.factory.get('/api/orders/', **self.auth)), 'default')
+        # Other clients and failed writes are not pinned.
+        self.assertNotEqual(self.read_database(self.factory.get('/api/orders/')), 'default')
+        cache.clear()
+        self.read_database(self.factory.post('/api/orders/', **self.auth), status=400)
+        self.assertNotEqual(self.read_database(self.factory.get('/api/orders/', **self.auth)), 'default')
+
+    def test_fails_over_to_healthy_replica_then_primary(self):
+        self.check_replica.side_effect = lambda alias: alias == 'replica_1'
+        self.assertEqual(self.read_database(self.factory.get('/api/products/')), 'replica_1')
+
+        middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse())
+        with db_router.replica_reads():
+            ReplicaRouter().db_for_read(Product)
+            middleware.process_exception(None, OperationalError('server closed the connection'))
+        self.assertEqual(self.read_database(self.factory.get('/api/products/')), 'default')
@@ -0,0 +1,77 @@
+import csv
+import io
+from datetime import timedelta
+
+import orjson
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from users.models import User
+
+
+class StreamingExportTest(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.customer = User.objects.create_user(username='customer', password='testpass123')
+        self.books = Category.objects.create(name='Books')
+        games = Category.objects.create(name='Games')
+        self.products = [
+            Product.objects.create(
+                category=self.books if i % 2 else games, sku=f'SKU-{i}', name=f'Product {i}',
+                description='Line one\nline "two"', price='9.99', stock=i,
+            )
+            for i in range(5)
+        ]
+        for n in range(5):
+            order = Order.objects.create(
+                user=self.customer, total_price=20, status='COMPLETED' if n % 2 else 'PENDING'
+            )
+            OrderItem.objects.create(order=order, product=self.products[n], quantity=2, price=10)
+        self.client.force_authenticate(self.staff)
+
+    def stream(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content)
+
+    def test_products_ndjson(self):
+        url = reverse('api:product-export')
+        response, body = self.stream(url, {'category': self.books.id})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [orjson.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['sku'] for row in rows], ['SKU-1', 'SKU-3'])
+        self.assertEqual((rows[0]['price'], rows[0]['category__name']), ('9.99', 'Books'))
+        self.assertTrue(rows[0]['updated_at'].endswith('Z'))
+
+    def test_products_csv_since(self):
+        later = timezone.now() + timedelta(minutes=1)
+        Product.objects.filter(sku='SKU-4').update(updated_at=later + timedelta(seconds=1))
+        response, body = self.stream(
+            reverse('api:product-export'), {'output': 'csv', 'since': later.isoformat()}
+        )
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual([row['sku'] for row in rows], ['SKU-4'])
+        self.assertEqual(rows[0]['description'], 'Line one\nline "two"')
+        self.assertEqual(rows[0]['image'], '')
+
+        response = self.client.get(reverse('api:product-export'), {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_orders_with_items(self):
+        url = reverse('api:order-export')
+        with self.assertNumQueries(2):  # Orders, then the items of the only chunk
+            response, body = self.stream(url, {'status': 'COMPLETED'})
+        rows = [orjson.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['status'] for row in rows], ['COMPLETED', 'COMPLETED'])
+        self.assertEqual(rows[0]['items'], [
+            {'product': self.products[1].id, 'quantity': 2, 'price': '10.00'}
+        ])
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.customer)
+        for name in ('api:product-export', 'api:order-export'):
+            self.assertEqual(self.client.get(reverse(name)).status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APITestCase
+from products.models import Category, Product
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import User
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Books')
+        self.product = Product.objects.create(
+            category=category, name='Book', description='Paperback.', price=10, stock=1
+        )
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_request_database_work_is_observed_per_route(self):
+        before = sample('ecomapp_request_db_queries_count', view='api:product-list')
+        self.client.get(reverse('api:product-list'))
+        self.assertEqual(sample('ecomapp_request_db_queries_count', view='api:product-list'), before + 1)
+        self.assertGreater(sample('ecomapp_request_db_queries_sum', view='api:product-list'), 0)
+
+    def test_response_cache_hits_and_misses(self):
+        hits = sample('ecomapp_response_cache_requests_total', namespace='products', result='hit')
+        misses = sample('ecomapp_response_cache_requests_total', namespace='products', result='miss')
+        self.client.get(reverse('api:product-list'))
+        self.client.get(reverse('api:product-list'))
+        self.assertEqual(sample('ecomapp_response_cache_requests_total', namespace='products', result='miss'), misses + 1)
+        self.assertEqual(sample('ecomapp_response_cache_requests_total', namespace='products', result='hit'), hits + 1)
+
+    def test_order_outcomes(self):
+        created = sample('ecomapp_orders_total', mode='sync', outcome='created')
+        short = sample('ecomapp_orders_total', mode='sync', outcome='insufficient_stock')
+        url = reverse('api:order-list')
+        payload = {'items': [{'product_id': self.product.id, 'quantity': 1}]}
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(sample('ecomapp_orders_total', mode='sync', outcome='created'), created + 1)
+        self.assertEqual(sample('ecomapp_orders_total', mode='sync', outcome='insufficient_stock'), short + 1)
+
+    def test_metrics_endpoint(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'django_http_requests_latency_seconds_by_view_method', response.content)
+        self.assertIn(b'ecomapp_request_db_queries', response.content)
@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from core import outbox
+from core.models import OutboxEvent
+from users.models import User
+from products.models import Category, Product
+
+
+class OrderOutboxTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        category = Category.objects.create(name='Electronics')
+        self.product = Product.objects.create(
+            category=category, name='Smartphone', description='Latest model.', price=800, stock=1
+        )
+
+    def order(self, quantity):
+        data = {'items': [{'product_id': self.product.id, 'quantity': quantity}]}
+        return self.client.post(reverse('api:order-list'), data, format='json')
+
+    def test_event_is_written_with_the_order(self):
+        response = self.order(1)
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.topic, event.payload), ('order.created', {'order_id': response.data['id']}))
+        self.assertIsNone(event.sent_at)
+
+    def test_no_event_when_order_fails(self):
+        self.order(2)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+class DispatchOutboxTest(TestCase):
+    def test_pending_events_are_published_once(self):
+        first = outbox.publish('order.created', order_id=1)
+        second = outbox.publish('order.accepted', order_id=2)
+
+        with mock.patch.object(outbox.current_app, 'producer_or_acquire'), \
+                mock.patch.object(outbox.current_app, 'send_task') as send_task:
+            self.assertEqual(outbox.dispatch_outbox(), 2)
+            self.assertEqual(outbox.dispatch_outbox(), 0)
+
+        self.assertEqual(
+            [(call.args[0], call.kwargs['kwargs']) for call in send_task.call_args_list],
+            [('orders.tasks.notify_order_created', {'order_id': 1}),
+             ('orders.tasks.materialize_pending_orders', {'order_id': 2})],
+        )
+        self.assertFalse(OutboxEvent.objects.filter(id__in=[first.id, second.id], sent_at__isnull=True).exists())
+
+    def test_unknown_topic_is_rejected(self):
+        with self.assertRaises(ValueError):
+            outbox.publish('order.unknown')
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from products.models import Category, Product
+
+
+class KeysetPaginationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Books')
+        # Duplicate prices make sure the id tiebreaker is honoured.
+        for i in range(25):
+            Product.objects.create(
+                category=category,
+                name=f'Product {i}',
+                description='Description',
+                price=10 + i % 5,
+                stock=5
+            )
+        self.url = reverse('api:product-list')
+
+    def walk(self, params):
+        ids, url, data = [], self.url, params
+        while url:
+            response = self.client.get(url, data)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            url, data = response.data['next'], None
+        return ids
+
+    def test_cursor_pages_follow_ordering_without_gaps(self):
+        ids = self.walk({'pagination': 'cursor', 'ordering': '-price'})
+        expected = list(Product.objects.order_by('-price', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(self.url, {'pagination': 'cursor'})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_cursor_mode_skips_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'pagination': 'cursor'})
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_models_without_default_ordering_field_seek_on_id(self):
+        # Category has no created_at.
+        for i in range(11):
+            Category.objects.create(name=f'Category {i}')
+        url = reverse('api:category-list')
+        first = self.client.get(url, {'pagination': 'cursor'})
+        self.assertEqual(first.status_code, 200)
+        second = self.client.get(first.data['next'])
+        ids = [item['id'] for item in first.data['results'] + second.data['results']]
+        self.assertEqual(ids, list(Category.objects.order_by('id').values_list('id', flat=True)))
+
+        response = self.client.get(reverse('async-api:category-list'), {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 10)
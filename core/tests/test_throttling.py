@@ -0,0 +1,49 @@
+from unittest import mock
+
+import fakeredis
+from django.test import RequestFactory, TestCase
+from core import throttling
+from users.models import User
+
+
+class GCRAThrottleTest(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        patcher = mock.patch.object(throttling, 'get_redis_connection', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def make_throttle(self, rate):
+        throttle = throttling.UserRateThrottle()
+        throttle.rate = rate
+        throttle.num_requests, throttle.duration = throttle.parse_rate(rate)
+        return throttle
+
+    def request(self, user=None):
+        request = RequestFactory().get('/api/products/')
+        request.user = user or self.user
+        return request
+
+    def test_allows_burst_then_throttles(self):
+        throttle = self.make_throttle('3/minute')
+        results = [throttle.allow_request(self.request(), None) for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+        # The next request frees up one emission interval (20s) later.
+        self.assertGreater(throttle.wait(), 19)
+        self.assertLessEqual(throttle.wait(), 20)
+
+    def test_clients_are_throttled_independently(self):
+        throttle = self.make_throttle('1/minute')
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.assertTrue(throttle.allow_request(self.request(), None))
+        self.assertFalse(throttle.allow_request(self.request(), None))
+        self.assertTrue(throttle.allow_request(self.request(other), None))
+
+    def test_state_is_one_expiring_key_per_client(self):
+        throttle = self.make_throttle('100/minute')
+        for _ in range(50):
+            throttle.allow_request(self.request(), None)
+        keys = self.redis.keys('*')
+        self.assertEqual(len(keys), 1)
+        self.assertLessEqual(self.redis.pttl(keys[0]), 30000)
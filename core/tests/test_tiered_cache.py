@@ -0,0 +1,133 @@
+import time
+from unittest import mock
+
+import fakeredis
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from prometheus_client import REGISTRY
+
+from core import tiered_cache as tiered
+from core.tiered_cache import LocalLRU, TieredCache
+
+
+def sample(tier, result):
+    return REGISTRY.get_sample_value('ecomapp_cache_requests_total', {'tier': tier, 'result': result}) or 0
+
+
+@override_settings(CACHE_L1_ENABLED=True, CACHE_L1_MAX_ENTRIES=100, CACHE_L1_TIMEOUT=60)
+class TieredCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        server = fakeredis.FakeServer()
+        patcher = mock.patch.object(
+            tiered, 'get_redis_connection', side_effect=lambda alias: fakeredis.FakeStrictRedis(server=server)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def worker(self):
+        """
+        A TieredCache standing in for another Gunicorn worker.
+        """
+        worker = TieredCache()
+        worker.get_local()
+        self.assertTrue(worker.subscribed.wait(2))
+        self.addCleanup(worker.stop)
+        return worker
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 2
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_reads_are_served_from_l1_after_the_first(self):
+        worker = self.worker()
+        cache.set('key', 'value')
+        l1_hits, l2_hits = sample('l1', 'hit'), sample('l2', 'hit')
+
+        self.assertEqual(worker.get('key'), 'value')
+        cache.set('key', 'changed behind its back')
+        self.assertEqual(worker.get('key'), 'value')
+        self.assertEqual(sample('l2', 'hit'), l2_hits + 1)
+        self.assertEqual(sample('l1', 'hit'), l1_hits + 1)
+
+        # A value failing validation is read from Redis again.
+        self.assertEqual(worker.get('key', validate=lambda value: False), 'changed behind its back')
+
+    def test_writes_and_invalidations_reach_other_workers(self):
+        first, second = self.worker(), self.worker()
+        first.set('key', 1)
+        self.assertEqual(second.get('key'), 1)
+
+        first.set('key', 2)
+        self.assertTrue(self.wait_for(lambda: second.local.get('key') is None))
+        self.assertEqual(second.get('key'), 2)
+
+        first.delete('key')
+        self.assertTrue(self.wait_for(lambda: second.local.get('key') is None))
+        self.assertIsNone(second.get('key'))
+
+    def test_invalidation_during_read_is_not_undone(self):
+        worker = self.worker()
+        cache.set('key', 'old')
+        get = cache.get
+
+        def read_then_invalidated(key, default=None):
+            value = get(key, default)
+            worker.receive(f'other-worker|{key}')  # Handled while the read was in flight
+            return value
+
+        with mock.patch.object(cache, 'get', side_effect=read_then_invalidated):
+            self.assertEqual(worker.get('key'), 'old')
+        self.assertIsNone(worker.local.get('key'))
+
+    def test_processes_without_l1_still_broadcast(self):
+        worker, celery = self.worker(), TieredCache()
+        worker.set('key', 1)
+        with override_settings(CACHE_L1_ENABLED=False):
+            cache.incr('key')
+            celery.invalidate('key')
+        self.assertTrue(self.wait_for(lambda: worker.local.get('key') is None))
+        self.assertEqual(worker.get('key'), 2)
+        self.assertIsNone(celery.local)
+
+    def test_disabled_reads_through(self):
+        worker = TieredCache()
+        cache.set('key', 'value')
+        with override_settings(CACHE_L1_ENABLED=False):
+            self.assertEqual(worker.get('key'), 'value')
+        self.assertIsNone(worker.local)
+
+
+class LocalLRUTest(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        lru = LocalLRU(max_entries=2, timeout=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+
+    def test_entries_expire(self):
+        lru = LocalLRU(max_entries=2, timeout=-1)
+        lru.set('a', 1)
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(len(lru), 0)
+
+    def test_set_since_skips_invalidated_keys(self):
+        lru = LocalLRU(max_entries=2, timeout=60)
+        since = lru.version()
+        lru.delete('a')
+        self.assertFalse(lru.set('a', 1, since=since))
+        self.assertTrue(lru.set('b', 2, since=since))
+        self.assertTrue(lru.set('a', 1, since=lru.version()))
+
+        # Once the record of an invalidation is dropped, older reads are refused.
+        since = lru.version()
+        for key in 'cde':
+            lru.delete(key)
+        self.assertFalse(lru.set('f', 1, since=since))
+        since = lru.version()
+        lru.clear()
+        self.assertFalse(lru.set('a', 1, since=since))
@@ -0,0 +1,291 @@
+"""
+Two-tier cache: a per-process LRU (L1) in front of the default cache (L2,
+Redis).
+
+Values read from Redis are kept in the process, unpickled, for up to
+`CACHE_L1_TIMEOUT` seconds and at most `CACHE_L1_MAX_ENTRIES` of them.
+Writes and invalidations through `tiered_cache` are published on a Redis
+channel, also from processes without an L1 (Celery workers, management
+commands), and every process drops its copy as soon as its listener
+thread receives the message; if a message is lost, the L1 timeout bounds
+how long a process keeps the old value.
+
+Values served from L1 are shared between requests; treat them as
+read-only.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'cache:l1-invalidate'
+CLEAR_ALL = '*'
+_MISSING = object()
+
+
+class LocalLRU:
+    """
+    Thread-safe LRU mapping with a per-entry TTL.
+
+    Deletes and clears are numbered, so a reader can fill in a value it
+    fetched elsewhere only if the key was not invalidated meanwhile: take
+    `version()` before the fetch and pass it to `set(..., since=)`.
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._version = 0
+        self._invalidated = OrderedDict()  # key -> version of its last delete
+        self._forgotten = 0  # Latest version no longer in _invalidated
+        self._lock = threading.Lock()
+
+    def version(self):
+        with self._lock:
+            return self._version
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, since=None):
+        """
+        Store `value`; with `since`, only if `key` was not invalidated after
+        that version. Returns whether it was stored.
+        """
+        with self._lock:
+            if since is not None and (
+                self._forgotten > since or self._invalidated.get(key, 0) > since
+            ):
+                return False
+            self._data[key] = (value, time.monotonic() + self.timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._version += 1
+            self._invalidated[key] = self._version
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.max_entries:
+                _, self._forgotten = self._invalidated.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._version += 1
+            self._invalidated.clear()
+            self._forgotten = self._version
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Reads through L1 then `backend`; writes to both and broadcasts the key.
+
+    Without `CACHE_L1_ENABLED` every call goes straight to `backend`, but
+    writes are still broadcast for the processes that have one. When the
+    backend is not django_redis (tests, local dev) there is no channel and
+    invalidations only reach the current process.
+    """
+
+    def __init__(self, backend=cache, alias='default'):
+        self.backend = backend
+        self.alias = alias
+        self.local = None
+        self.client = None
+        self.sender = None
+        self.subscribed = threading.Event()
+        self._stopped = threading.Event()
+        self._pid = None
+        self._client_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return settings.CACHE_L1_ENABLED
+
+    @property
+    def channel(self):
+        return self.backend.make_key(CHANNEL)
+
+    def get_client(self):
+        """
+        The Redis client invalidations are published with, or None when the
+        backend is not django_redis.
+        """
+        # Per process: a forked worker has no right to its parent's sender id.
+        pid = os.getpid()
+        if self._client_pid != pid:
+            with self._lock:
+                if self._client_pid != pid:
+                    try:
+                        self.client = get_redis_connection(self.alias)
+                    except NotImplementedError:
+                        self.client = None
+                    self.sender = uuid.uuid4().hex
+                    self._client_pid = pid
+        return self.client
+
+    def get_local(self):
+        # Per process, like the client: a forked worker does not inherit
+        # the listener thread.
+        pid = os.getpid()
+        if self._pid != pid:
+            client = self.get_client()
+            with self._lock:
+                if self._pid != pid:
+                    self.local = LocalLRU(settings.CACHE_L1_MAX_ENTRIES, settings.CACHE_L1_TIMEOUT)
+                    self.subscribed.clear()
+                    self.start_listener(client)
+                    self._pid = pid
+        return self.local
+
+    def start_listener(self, client):
+        if client is None:
+            return
+        threading.Thread(
+            target=self.listen, args=(client,), name='cache-l1-invalidation', daemon=True
+        ).start()
+
+    def listen(self, client):
+        while not self._stopped.is_set():
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Anything published while we were not subscribed is lost.
+                self.local.clear()
+                self.subscribed.set()
+                while not self._stopped.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.receive(message['data'])
+                pubsub.close()
+            except RedisError:
+                self.subscribed.clear()
+                logger.warning('L1 cache invalidation listener lost Redis; retrying.', exc_info=True)
+                self._stopped.wait(1)
+
+    def stop(self):
+        self._stopped.set()
+
+    def receive(self, data):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        sender, _, key = data.partition('|')
+        if sender == self.sender:
+            return
+        if key == CLEAR_ALL:
+            self.local.clear()
+        else:
+            self.local.delete(key)
+
+    def publish(self, key):
+        client = self.get_client()
+        if client is None:
+            return
+        try:
+            client.publish(self.channel, f'{self.sender}|{key}')
+        except RedisError:
+            logger.warning('Could not broadcast invalidation of %s.', key, exc_info=True)
+
+    def get(self, key, default=None, validate=None):
+        """
+        The value of `key`, from L1 unless it is missing there or
+        `validate(value)` is false.
+        """
+        if not self.enabled:
+            return self.backend.get(key, default)
+        local = self.get_local()
+        value = local.get(key, _MISSING)
+        if value is not _MISSING and (validate is None or validate(value)):
+            CACHE_REQUESTS.labels('l1', 'hit').inc()
+            return value
+        CACHE_REQUESTS.labels('l1', 'miss').inc()
+        since = local.version()
+        value = self.backend.get(key, _MISSING)
+        return self.fill(local, key, value, default, since)
+
+    async def aget(self, key, default=None, validate=None):
+        if not self.enabled:
+            return await self.backend.aget(key, default)
+        local = self.get_local()
+        value = local.get(key, _MISSING)
+        if value is not _MISSING and (validate is None or validate(value)):
+            CACHE_REQUESTS.labels('l1', 'hit').inc()
+            return value
+        CACHE_REQUESTS.labels('l1', 'miss').inc()
+        since = local.version()
+        value = await self.backend.aget(key, _MISSING)
+        return self.fill(local, key, value, default, since)
+
+    def fill(self, local, key, value, default, since):
+        if value is _MISSING:
+            CACHE_REQUESTS.labels('l2', 'miss').inc()
+            return default
+        CACHE_REQUESTS.labels('l2', 'hit').inc()
+        # Not if an invalidation arrived while reading: `value` may predate it.
+        local.set(key, value, since=since)
+        return value
+
+    def set(self, key, value, timeout=None):
+        self.backend.set(key, value, timeout=timeout)
+        if self.enabled:
+            self.get_local().set(key, value)
+        self.publish(key)
+
+    async def aset(self, key, value, timeout=None):
+        await self.backend.aset(key, value, timeout=timeout)
+        if self.enabled:
+            self.get_local().set(key, value)
+        await sync_to_async(self.publish, thread_sensitive=False)(key)
+
+    def invalidate(self, key):
+        """
+        Drop `key` from every process's L1, e.g. after changing it in L2
+        with an atomic operation such as `incr`.
+        """
+        if self.enabled:
+            self.get_local().delete(key)
+        self.publish(key)
+
+    def delete(self, key):
+        self.backend.delete(key)
+        self.invalidate(key)
+
+    def clear_local(self):
+        """
+        Drop every process's L1, leaving Redis alone.
+        """
+        if self.enabled:
+            self.get_local().clear()
+        self.publish(CLEAR_ALL)
+
+
+tiered_cache = TieredCache()
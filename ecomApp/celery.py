@@ -13,3 +13,7 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
+
+# Task metrics and the worker's Prometheus exporter hook into Celery signals,
+# which must be connected before the worker starts.
+from core import metrics  # noqa: E402,F401
@@ -1,5 +1,5 @@
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import os
 from datetime import timedelta
 
@@ -12,7 +12,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = config('SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = config('DEBUG', default=True, cast=bool)
 
 ALLOWED_HOSTS = ['*']
 
@@ -23,6 +23,43 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-redis-stock': {
+        'task': 'products.tasks.reconcile_redis_stock',
+        'schedule': 30.0,
+    },
+    'materialize-pending-orders': {
+        'task': 'orders.tasks.materialize_pending_orders',
+        'schedule': 5.0,  # Safety net; accepted orders also enqueue a run
+    },
+    'flush-order-confirmations': {
+        'task': 'orders.tasks.flush_order_confirmations',
+        'schedule': 10.0,
+    },
+    'dispatch-outbox': {
+        'task': 'core.tasks.dispatch_outbox',
+        'schedule': 1.0,
+    },
+    'purge-outbox': {
+        'task': 'core.tasks.purge_outbox',
+        'schedule': 24 * 60 * 60.0,
+    },
+}
+
+# Outbox topic -> Celery task receiving the event payload as kwargs
+OUTBOX_HANDLERS = {
+    'order.created': 'orders.tasks.notify_order_created',
+    'order.accepted': 'orders.tasks.materialize_pending_orders',
+    'product.image_uploaded': 'products.tasks.process_product_image',
+    'product.import_uploaded': 'products.tasks.import_product_feed',
+}
+
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@ecomapp.local')
+
+# Reserve stock of products in REDIS inventory mode against Redis counters
+# instead of locking their rows (see products.inventory).
+INVENTORY_REDIS_ENABLED = config('INVENTORY_REDIS_ENABLED', default=False, cast=bool)
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -34,6 +71,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     'django_filters',
+    'django_prometheus',
     'rest_framework_simplejwt',
     'drf_yasg',
 
@@ -56,24 +94,51 @@ DATABASES = {
     }
 }
 
+# Streaming replicas of the primary, as comma-separated host[:port] entries.
+# Safe requests read from them (see core.db_router), except to fill the
+# response cache; after a write, the client's reads stay on the primary for
+# DATABASE_REPLICA_STICKY_SECONDS.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(config('DATABASE_REPLICA_HOSTS', default='', cast=Csv())):
+    host, _, port = replica.partition(':')
+    DATABASES[f'replica_{index}'] = dict(
+        DATABASES['default'], HOST=host, PORT=port or DATABASES['default']['PORT'],
+        TEST={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+DATABASE_REPLICA_STICKY_SECONDS = config('DATABASE_REPLICA_STICKY_SECONDS', default=5, cast=int)
+DATABASE_REPLICA_MAX_LAG = config('DATABASE_REPLICA_MAX_LAG', default=10, cast=float)  # seconds
+DATABASE_REPLICA_CHECK_INTERVAL = 5  # seconds between health checks of a replica
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',  # Same bytes as JSONRenderer, several times faster
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.HybridPagination',  # ?pagination=cursor for keyset pages
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.UserRateThrottle',
-        'rest_framework.throttling.AnonRateThrottle',
+        'core.throttling.UserRateThrottle',  # one atomic Redis call per check
+        'core.throttling.AnonRateThrottle',
     ],
     
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '100/minute',  # 100 requests per minute for anonymous users
-        'user': '1000/minute',  # 1000 requests per minute for authenticated users
+        'anon': config('THROTTLE_ANON_RATE', default='100/minute'),  # 100 requests per minute for anonymous users
+        'user': config('THROTTLE_USER_RATE', default='1000/minute'),  # 1000 requests per minute for authenticated users
     }
 }
 
@@ -103,6 +168,16 @@ CACHES = {
     }
 }
 
+# Per-process LRU in front of Redis for hot, small entries (generation
+# counters, cached responses), invalidated over Redis pub/sub; see core.tiered_cache.
+CACHE_L1_ENABLED = config('CACHE_L1_ENABLED', default=False, cast=bool)
+CACHE_L1_MAX_ENTRIES = config('CACHE_L1_MAX_ENTRIES', default=1000, cast=int)
+CACHE_L1_TIMEOUT = config('CACHE_L1_TIMEOUT', default=10, cast=int)  # seconds, if an invalidation is lost
+
+# Seconds shared caches (the nginx microcache, CDNs) may reuse an anonymous
+# catalogue response; clients always revalidate with its ETag.
+CATALOGUE_S_MAXAGE = config('CATALOGUE_S_MAXAGE', default=1, cast=int)
+
 CSRF_TRUSTED_ORIGINS = ['http://localhost:8000']
 
 # Optional: Session configuration using Redis cache
@@ -132,6 +207,9 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 
 MIDDLEWARE = [
+    'django_prometheus.middleware.PrometheusBeforeMiddleware',  # Must come first
+    'core.middleware.ReplicaRoutingMiddleware',  # Must wrap everything that reads
+    'core.metrics.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -143,11 +221,16 @@ MIDDLEWARE = [
 
 INSTALLED_APPS += ['debug_toolbar',]
 
-MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware',]
+if DEBUG:
+    # Sync-only middleware: it would push every ASGI request through a thread.
+    MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware',]
 
 MIDDLEWARE += [
     'django.middleware.csrf.CsrfViewMiddleware',
 ]
+
+MIDDLEWARE += ['django_prometheus.middleware.PrometheusAfterMiddleware',]  # Must come last
+
 INTERNAL_IPS = [
     '127.0.0.1',
     'localhost',
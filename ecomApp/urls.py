@@ -40,12 +40,14 @@ schema_view = get_schema_view(
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include((router.urls, 'api'), namespace='api')),  # Use the router for all API endpoints
+    path('api/async/', include(('products.async_urls', 'async-api'), namespace='async-api')),  # Served by the ASGI service
     path('api/auth/', include('rest_framework.urls', namespace='rest_framework')),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     path('__debug__/', include('debug_toolbar.urls')),  # Debug Toolbar
+    path('', include('django_prometheus.urls')),  # /metrics
 ]
 
 # Serve media files in development mode
@@ -0,0 +1,11 @@
+# Loaded automatically by gunicorn from the working directory.
+from core.metrics import mark_process_dead, reset_multiprocess_dir
+
+
+def on_starting(server):
+    # Samples of a previous run's workers would otherwise be summed in.
+    reset_multiprocess_dir()
+
+
+def child_exit(server, worker):
+    mark_process_dead(worker.pid)
@@ -1,39 +1,280 @@
-from locust import HttpUser, task, between
+"""
+Load-test profiles for the API.
 
-class EcommerceUser(HttpUser):
-    wait_time = between(1, 5)
-    token = None
+Each profile is a user class. Run one headless against a stack seeded
+with `python manage.py seed_benchmark_data` (same sizes as the LOAD_*
+variables below); the run exits with code 1 when the profile's SLOs were
+missed:
+
+    locust -f locustfile.py --headless --host http://localhost \\
+        --users 200 --spawn-rate 20 --run-time 5m --csv reports/browse BrowseHeavy
+
+All simulated users share the load generator's IP, and logins are
+throttled per IP at THROTTLE_ANON_RATE (100/minute by default), so start
+the stack with the limits raised, as benchmarks/asgi_vs_wsgi.py does:
+
+    THROTTLE_ANON_RATE=100000000/minute THROTTLE_USER_RATE=100000000/minute
+
+Otherwise logins are rejected with 429 and count against the SLOs; a
+user whose login fails backs off (honouring Retry-After) instead of
+trying again before every task.
+
+Profiles: BrowseHeavy, SearchHeavy, FlashSale, CheckoutHeavy and Mixed.
+
+Every simulated user logs in as one of the generated `bench_user_*`
+accounts, refreshes its access token as it ages, and picks products with
+Zipf-distributed popularity, so a few products are hot (cache hits, stock
+contention) and the long tail misses the cache.
+
+Environment:
+    LOAD_USERS, LOAD_PRODUCTS, LOAD_CATEGORIES   sizes of the seeded dataset
+    LOAD_ZIPF_EXPONENT                           popularity skew (default 1.1)
+    LOAD_TOKEN_REFRESH                           seconds before refreshing a token
+    LOAD_ASYNC_ORDERS                            send orders with `Prefer: respond-async`
+    FLASH_SALE_PRODUCT                           contended product (default: the most popular)
+"""
+import itertools
+import logging
+import os
+import random
+import time
+import uuid
+from itertools import accumulate
+
+from locust import HttpUser, between, constant, events
+from locust.exception import RescheduleTask
+
+USERS = int(os.environ.get('LOAD_USERS', '1000'))
+PRODUCTS = int(os.environ.get('LOAD_PRODUCTS', '10000'))
+CATEGORIES = int(os.environ.get('LOAD_CATEGORIES', '50'))
+ZIPF_EXPONENT = float(os.environ.get('LOAD_ZIPF_EXPONENT', '1.1'))
+TOKEN_REFRESH = float(os.environ.get('LOAD_TOKEN_REFRESH', '300'))
+ASYNC_ORDERS = os.environ.get('LOAD_ASYNC_ORDERS', '').lower() in ('1', 'true', 'yes')
+PASSWORD = 'benchmark'  # See seed_benchmark_data
+LOGIN_BACKOFF_MAX = 60  # seconds
+
+# Words the seeded product names and descriptions are built from.
+SEARCH_TERMS = [
+    'wireless', 'organic', 'vintage', 'compact', 'premium', 'portable', 'ergonomic', 'waterproof',
+    'headphones', 'backpack', 'keyboard', 'lamp', 'kettle', 'camera', 'blender', 'jacket',
+    'steel', 'bamboo', 'leather', 'cotton',
+]
+
+logger = logging.getLogger(__name__)
+
+
+class Zipf:
+    """
+    Product ids drawn with probability proportional to 1 / rank ** s. Ranks
+    are assigned by a fixed shuffle, so the hot products are the same on
+    every run but are not simply the lowest ids.
+    """
+
+    def __init__(self, count, exponent, seed=42):
+        self.ids = list(range(1, count + 1))
+        random.Random(seed).shuffle(self.ids)
+        self.cum_weights = list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+    def sample(self, k=1):
+        return random.choices(self.ids, cum_weights=self.cum_weights, k=k)
+
+
+POPULARITY = Zipf(PRODUCTS, ZIPF_EXPONENT)
+FLASH_SALE_PRODUCT = int(os.environ.get('FLASH_SALE_PRODUCT', POPULARITY.ids[0]))
+
+# Simulated users take accounts round-robin from the generated pool.
+_accounts = itertools.cycle(range(1, USERS + 1))
+
+
+def browse_page(user):
+    # Mostly the first pages, with a tail of deep ones.
+    page = min(int(random.paretovariate(1.2)), max(1, PRODUCTS // 10))
+    user.get('/api/products/', {'page': page}, name='products list')
+
+
+def browse_cursor(user):
+    response = user.get('/api/products/', {'pagination': 'cursor', 'ordering': 'price'}, name='products cursor')
+    for _ in range(random.randint(0, 3)):
+        if not response.ok or not response.json().get('next'):
+            return
+        response = user.client.get(response.json()['next'], headers=user.headers(), name='products cursor')
+
+
+def browse_category(user):
+    params = {'category': random.randint(1, CATEGORIES)}
+    if random.random() < 0.5:
+        params['ordering'] = random.choice(['price', '-price', '-created_at'])
+    user.get('/api/products/', params, name='products by category')
+
+
+def list_categories(user):
+    user.get('/api/categories/', name='categories list')
+
+
+def view_product(user):
+    user.get(f'/api/products/{POPULARITY.sample()[0]}/', name='product detail')
+
+
+def search(user):
+    params = {'search': ' '.join(random.sample(SEARCH_TERMS, random.choice([1, 1, 2])))}
+    if random.random() < 0.3:
+        params['category'] = random.randint(1, CATEGORIES)
+    user.get('/api/products/', params, name='product search')
+
+
+def checkout(user):
+    quantities = {}
+    for product_id in POPULARITY.sample(random.randint(1, 3)):
+        quantities[product_id] = quantities.get(product_id, 0) + random.randint(1, 2)
+    user.order(quantities, name='create order')
+
+
+def my_orders(user):
+    user.get('/api/orders/', name='my orders')
+
+
+def flash_sale_order(user):
+    user.order({FLASH_SALE_PRODUCT: 1}, name='flash sale order')
+
+
+def view_flash_sale_product(user):
+    user.get(f'/api/products/{FLASH_SALE_PRODUCT}/', name='flash sale product')
+
+
+class Shopper(HttpUser):
+    """
+    A logged-in user from the generated pool. Profiles set `tasks`, the
+    think time and their SLOs.
+    """
+    abstract = True
+    wait_time = between(1, 3)
+    # p95/p99 latency over all requests, and the share of failed requests.
+    slo = {'p95_ms': 500, 'p99_ms': 1500, 'failure_ratio': 0.01}
 
     def on_start(self):
+        self.username = f'bench_user_{next(_accounts):07d}'
+        self.login_failures = 0
+        self.login_at = 0
         self.login()
 
     def login(self):
-        response = self.client.post("/api/token/", json={
-            "username": "test_user",
-            "password": "password123" 
-        })
+        response = self.client.post(
+            '/api/token/', json={'username': self.username, 'password': PASSWORD}, name='token',
+        )
+        if response.status_code != 200:
+            logger.error('Login failed for %s: %s', self.username, response.status_code)
+            self.access = self.refresh = None
+            self.login_failures += 1
+            backoff = min(LOGIN_BACKOFF_MAX, 2 ** self.login_failures)
+            try:
+                backoff = max(backoff, float(response.headers.get('Retry-After', 0)))
+            except ValueError:
+                pass
+            self.login_at = time.monotonic() + backoff
+            return
+        self.login_failures = 0
+        self.access, self.refresh = response.json()['access'], response.json()['refresh']
+        self.refresh_at = time.monotonic() + TOKEN_REFRESH
+
+    def refresh_access(self):
+        response = self.client.post('/api/token/refresh/', json={'refresh': self.refresh}, name='token refresh')
         if response.status_code == 200:
-            self.token = response.json().get("access")
-            print(f"Logged in! Token: {self.token}")
+            self.access = response.json()['access']
+            self.refresh_at = time.monotonic() + TOKEN_REFRESH
         else:
-            print(f"Failed to log in: {response.status_code} - {response.text}")
-
-    @task(1)
-    def view_products(self):
-        headers = self._get_headers()
-        self.client.get("/api/products/", headers=headers)
-
-    @task(2)
-    def create_order(self):
-        headers = self._get_headers()
-        self.client.post("/api/orders/", json={
-            "items": [
-                {"product_id": 1, "quantity": 2},
-                {"product_id": 2, "quantity": 1}
-            ]
-        }, headers=headers)
-
-    def _get_headers(self):
-        if self.token:
-            return {"Authorization": f"Bearer {self.token}"}
-        return {}
+            self.login()
+
+    def headers(self):
+        now = time.monotonic()
+        if self.access is None:
+            if now >= self.login_at:
+                self.login()
+        elif now >= self.refresh_at:
+            self.refresh_access()
+        if self.access is None:
+            raise RescheduleTask()  # Backing off after a failed login; skip this task
+        return {'Authorization': f'Bearer {self.access}'}
+
+    def get(self, path, params=None, name=None):
+        return self.client.get(path, params=params, headers=self.headers(), name=name)
+
+    def order(self, quantities, name):
+        headers = self.headers()
+        headers['Idempotency-Key'] = str(uuid.uuid4())
+        if ASYNC_ORDERS:
+            headers['Prefer'] = 'respond-async'
+        payload = {'items': [
+            {'product_id': product_id, 'quantity': quantity} for product_id, quantity in quantities.items()
+        ]}
+        with self.client.post(
+            '/api/orders/', json=payload, headers=headers, name=name, catch_response=True,
+        ) as response:
+            # Selling out is an expected outcome under contention, not an error.
+            if response.status_code == 400 and 'Insufficient stock' in response.text:
+                response.success()
+
+
+class BrowseHeavy(Shopper):
+    tasks = {
+        view_product: 12, browse_page: 8, browse_category: 6, browse_cursor: 2,
+        list_categories: 2, search: 2, checkout: 1,
+    }
+    slo = {'p95_ms': 300, 'p99_ms': 1000, 'failure_ratio': 0.01}
+
+
+class SearchHeavy(Shopper):
+    tasks = {search: 10, view_product: 4, browse_category: 2, browse_page: 1}
+    slo = {'p95_ms': 500, 'p99_ms': 1500, 'failure_ratio': 0.01}
+
+
+class FlashSale(Shopper):
+    """
+    Everyone refreshing and buying one product at once.
+    """
+    tasks = {flash_sale_order: 8, view_flash_sale_product: 4}
+    wait_time = between(0, 0.5)
+    slo = {'p95_ms': 1000, 'p99_ms': 3000, 'failure_ratio': 0.02}
+
+
+class CheckoutHeavy(Shopper):
+    tasks = {checkout: 6, view_product: 4, my_orders: 2}
+    slo = {'p95_ms': 800, 'p99_ms': 2000, 'failure_ratio': 0.01}
+
+
+class Mixed(Shopper):
+    tasks = {
+        view_product: 10, browse_page: 6, browse_category: 4, search: 4, browse_cursor: 1,
+        list_categories: 1, checkout: 2, my_orders: 1, flash_sale_order: 1,
+    }
+    wait_time = constant(1)
+    slo = {'p95_ms': 500, 'p99_ms': 1500, 'failure_ratio': 0.01}
+
+
+def missed_slos(stats, slo):
+    total = stats.total
+    if not total.num_requests:
+        return ['no requests were made']
+    missed = []
+    for key, percentile in (('p95_ms', 0.95), ('p99_ms', 0.99)):
+        value = total.get_response_time_percentile(percentile)
+        if value > slo[key]:
+            missed.append(f'{key} {value:.0f} > {slo[key]}')
+    if total.fail_ratio > slo['failure_ratio']:
+        missed.append(f"failure ratio {total.fail_ratio:.2%} > {slo['failure_ratio']:.2%}")
+    return missed
+
+
+@events.quitting.add_listener
+def check_slos(environment, **kwargs):
+    if environment.stats is None or not environment.user_classes:
+        return
+    # When several profiles run together, hold the run to the strictest SLOs.
+    slos = [user_class.slo for user_class in environment.user_classes]
+    slo = {key: min(profile[key] for profile in slos) for key in slos[0]}
+    missed = missed_slos(environment.stats, slo)
+    profiles = ', '.join(user_class.__name__ for user_class in environment.user_classes)
+    if missed:
+        logger.error('SLOs missed (%s): %s', profiles, '; '.join(missed))
+        environment.process_exit_code = 1
+    else:
+        logger.info('SLOs met (%s): %s', profiles, slo)
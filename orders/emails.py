@@ -0,0 +1,116 @@
+import logging
+from itertools import groupby
+from smtplib import SMTPException
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django_redis import get_redis_connection
+
+from .models import OrderItem
+
+logger = logging.getLogger(__name__)
+
+CONFIRMATION_QUEUE = 'orders:confirmation-queue'
+CONFIRMATION_QUEUED_TIMEOUT = 24 * 60 * 60  # Longer than any redelivery of the same event
+BATCH_SIZE = 100
+
+# Queue an order's confirmation unless it already was, in one atomic call.
+# KEYS: queued marker, queue. ARGV: order id, marker timeout.
+# Returns the queue length, or 0 when the order was already queued.
+QUEUE_SCRIPT = """
+if redis.call('SET', KEYS[1], 1, 'NX', 'EX', ARGV[2]) then
+    return redis.call('RPUSH', KEYS[2], ARGV[1])
+end
+return 0
+"""
+MAIL_ERRORS = (SMTPException, OSError)
+
+
+class ConfirmationsNotSent(Exception):
+    """
+    Delivery failed partway through a batch; `order_ids` were not sent.
+    """
+    def __init__(self, order_ids, sent):
+        super().__init__(f'{len(order_ids)} order confirmations not sent after {sent} were.')
+        self.order_ids = order_ids
+        self.sent = sent
+
+
+def queue_order_confirmation(order_id):
+    """
+    Buffer a confirmation; `flush_order_confirmations` sends them in batches.
+
+    Events are delivered at least once, so an order is only queued the first
+    time; returns whether it was.
+    """
+    length = get_redis_connection('default').register_script(QUEUE_SCRIPT)(
+        keys=[f'orders:confirmation-queued:{order_id}', CONFIRMATION_QUEUE],
+        args=[order_id, CONFIRMATION_QUEUED_TIMEOUT],
+    )
+    if not length:
+        return False
+    if length >= BATCH_SIZE:
+        from .tasks import flush_order_confirmations
+        flush_order_confirmations.delay()
+    return True
+
+
+def pop_order_confirmations(count=BATCH_SIZE):
+    pipe = get_redis_connection('default').pipeline(transaction=True)
+    pipe.lrange(CONFIRMATION_QUEUE, 0, count - 1)
+    pipe.ltrim(CONFIRMATION_QUEUE, count, -1)
+    order_ids, _ = pipe.execute()
+    return [int(order_id) for order_id in order_ids]
+
+
+def build_confirmation_messages(order_ids, connection=None):
+    """
+    `(order_id, message)` pairs, from one query for every order, customer
+    and product in the batch.
+    """
+    items = (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .select_related('order__user', 'product')
+        .only(
+            'quantity', 'order__id', 'order__user__first_name', 'order__user__email',
+            'product__name',
+        )
+        .order_by('order_id', 'id')
+    )
+    messages = []
+    for order, order_items in groupby(items, key=lambda item: item.order):
+        if not order.user.email:
+            continue
+        message = f"Dear {order.user.first_name},\n\nYour order has been placed successfully.\n\nOrder Details:\n"
+        for item in order_items:
+            message += f"- {item.product.name} (Quantity: {item.quantity})\n"
+        message += "\nThank you for shopping with us!"
+        messages.append((order.id, EmailMessage(
+            f"Order Confirmation - Order #{order.id}",
+            message,
+            settings.DEFAULT_FROM_EMAIL,
+            [order.user.email],
+            connection=connection,
+        )))
+    return messages
+
+
+def send_order_confirmations(order_ids):
+    """
+    Send confirmations for `order_ids` over a single mail connection, one
+    message at a time. A delivery error raises ConfirmationsNotSent from it
+    with the ids still to send, so a retry does not repeat delivered ones.
+    """
+    with get_connection() as connection:
+        messages = build_confirmation_messages(order_ids, connection)
+        skipped = len(set(order_ids)) - len(messages)
+        if skipped:
+            logger.warning("Skipped %d order confirmations (order missing or no email).", skipped)
+        sent = 0
+        for index, (order_id, message) in enumerate(messages):
+            try:
+                sent += connection.send_messages([message]) or 0
+            except MAIL_ERRORS as exc:
+                unsent = [order_id for order_id, _ in messages[index:]]
+                raise ConfirmationsNotSent(unsent, sent) from exc
+        return sent
@@ -0,0 +1,196 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from core import outbox
+from core.metrics import ORDERS
+from products.inventory import (
+    InsufficientStock, RedisInventory, decrement_stock, lock_products,
+)
+from .models import Order, OrderItem
+
+BATCH_SIZE = 200
+# Orders left in PROCESSING this long (worker died mid-batch) are claimed again.
+STALE_CLAIM_AFTER = timedelta(minutes=5)
+
+
+def prefers_async(request):
+    """
+    True when the client sent `Prefer: respond-async` (RFC 7240).
+    """
+    preferences = request.headers.get('Prefer', '')
+    return any(token.strip().lower() == 'respond-async' for token in preferences.split(','))
+
+
+class AsyncIngestionMixin:
+    """
+    Lets clients opt into queued order creation with `Prefer: respond-async`.
+
+    The payload is validated, stored as a PENDING order with its lines in
+    `pending_items`, and a 202 with the order's status URL is returned.
+    Workers then move it through PROCESSING to COMPLETED (or CANCELLED
+    when stock runs out), see `materialize_pending_orders`.
+    """
+
+    def create(self, request, *args, **kwargs):
+        if not prefers_async(request):
+            return super().create(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=request.user,
+                total_price=0,
+                status='PENDING',
+                pending_items=[
+                    {'product_id': item['product_id'], 'quantity': item['quantity']}
+                    for item in serializer.validated_data['items']
+                ],
+            )
+            outbox.publish('order.accepted', order_id=order.pk)
+        ORDERS.labels('async', 'accepted').inc()
+
+        status_url = reverse('api:order-detail', args=[order.pk], request=request)
+        return Response(
+            {'id': order.pk, 'status': order.status, 'status_url': status_url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': status_url},
+        )
+
+
+def claim_pending_orders(batch_size=BATCH_SIZE):
+    """
+    Move up to `batch_size` queued orders to PROCESSING and return their ids.
+
+    `SKIP LOCKED` lets several workers claim disjoint batches concurrently.
+    """
+    stale = timezone.now() - STALE_CLAIM_AFTER
+    with transaction.atomic():
+        order_ids = list(
+            Order.objects.select_for_update(skip_locked=True)
+            .filter(pending_items__isnull=False)
+            .exclude(status='PROCESSING', updated_at__gt=stale)
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        Order.objects.filter(id__in=order_ids).update(status='PROCESSING', updated_at=timezone.now())
+    return order_ids
+
+
+def materialize_pending_orders(batch_size=BATCH_SIZE):
+    """
+    Turn a batch of queued orders into real orders.
+
+    The batch's products are locked once, in id order, and orders are
+    filled first-come first-served from that in-memory stock; the total
+    taken per product is written back with a single conditional UPDATE and
+    all items are inserted with one `bulk_create`. Returns the ids of the
+    orders that were completed.
+    """
+    order_ids = claim_pending_orders(batch_size)
+    if not order_ids:
+        return []
+
+    inventory = RedisInventory() if settings.INVENTORY_REDIS_ENABLED else None
+    reserved = []  # Counter reservations to hand back if the batch fails
+    try:
+        with transaction.atomic():
+            orders = list(
+                Order.objects.select_for_update().filter(id__in=order_ids).order_by('created_at', 'id')
+            )
+            products = lock_products({
+                line['product_id'] for order in orders for line in order.pending_items
+            })
+
+            available = {product_id: product.stock for product_id, product in products.items()}
+            taken = Counter()
+            items, completed = [], []
+            for order in orders:
+                quantities = Counter()
+                for line in order.pending_items:
+                    quantities[line['product_id']] += line['quantity']
+
+                reason, database_quantities = allocate(quantities, products, available, inventory, reserved)
+                if reason:
+                    order.status, order.failure_reason = 'CANCELLED', reason
+                else:
+                    taken.update(database_quantities)
+                    order_items = [
+                        OrderItem(
+                            order=order,
+                            product=products[line['product_id']],
+                            quantity=line['quantity'],
+                            price=products[line['product_id']].price * line['quantity'],
+                        )
+                        for line in order.pending_items
+                    ]
+                    items.extend(order_items)
+                    order.total_price = sum(item.price for item in order_items)
+                    order.status = 'COMPLETED'
+                    completed.append(order.pk)
+                order.pending_items = None
+
+            decrement_stock(dict(taken), products)
+            OrderItem.objects.bulk_create(items)
+            now = timezone.now()
+            for order in orders:
+                order.updated_at = now
+            Order.objects.bulk_update(
+                orders, ['status', 'total_price', 'pending_items', 'failure_reason', 'updated_at']
+            )
+    except Exception:
+        for quantities in reserved:
+            inventory.release(quantities)
+        raise
+    ORDERS.labels('async', 'completed').inc(len(completed))
+    ORDERS.labels('async', 'cancelled').inc(len(orders) - len(completed))
+    return completed
+
+
+def allocate(quantities, products, available, inventory, reserved):
+    """
+    Reserve one order's quantities.
+
+    Returns `(failure_reason, database_quantities)`, where the latter is
+    what has to come off the locked rows; counter reservations are
+    appended to `reserved`.
+    """
+    missing = sorted(set(quantities) - set(products))
+    if missing:
+        return f"Unknown products: {', '.join(map(str, missing))}.", None
+
+    counted = {}
+    if inventory is not None:
+        counted = {
+            product_id: quantity for product_id, quantity in quantities.items()
+            if products[product_id].inventory_mode == 'REDIS'
+        }
+    if counted:
+        try:
+            # Products whose counter went missing fall back to the rows.
+            for product_id in inventory.reserve(counted):
+                del counted[product_id]
+        except InsufficientStock as exc:
+            return f"Insufficient stock for product {products[exc.products[0]].name}.", None
+
+    database_quantities = {
+        product_id: quantity for product_id, quantity in quantities.items() if product_id not in counted
+    }
+    for product_id, quantity in sorted(database_quantities.items()):
+        if available[product_id] < quantity:
+            if counted:
+                inventory.release(counted)
+            return f"Insufficient stock for product {products[product_id].name}.", None
+
+    for product_id, quantity in database_quantities.items():
+        available[product_id] -= quantity
+    if counted:
+        reserved.append(counted)
+    return None, database_quantities
@@ -16,6 +16,24 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Lines of an order accepted through async ingestion, kept until a worker
+    # materializes them into OrderItems (see orders.ingestion).
+    pending_items = models.JSONField(null=True, blank=True, editable=False)
+    failure_reason = models.CharField(max_length=255, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (created_at, id), globally for staff
+            # and per user for customers.
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='order_user_created_id_idx'),
+            # Incremental exports (?since=) seek on (updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='order_updated_id_idx'),
+            models.Index(
+                fields=['created_at', 'id'], name='order_ingest_queue_idx',
+                condition=models.Q(pending_items__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
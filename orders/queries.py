@@ -0,0 +1,34 @@
+from django.db.models import Prefetch
+
+from products.queries import product_fields
+from .models import OrderItem
+
+ORDER_FIELDS = [
+    'id', 'user', 'total_price', 'status', 'failure_reason', 'created_at', 'updated_at',
+]
+ORDER_ITEM_FIELDS = ['id', 'order', 'product', 'quantity', 'price']
+
+
+def order_items_prefetch():
+    """
+    One query for all items of a page of orders, with product and category
+    joined in and only the columns OrderItemSerializer renders.
+    """
+    return Prefetch(
+        'items',
+        queryset=OrderItem.objects.select_related('product__category').only(
+            *ORDER_ITEM_FIELDS, *product_fields('product__')
+        ),
+    )
+
+
+def orders_for_serializer(queryset):
+    """
+    Orders ready for OrderSerializer: the user's name joined in (it is
+    rendered through `str(user)`) and items prefetched in one query.
+    """
+    return (
+        queryset.select_related('user')
+        .only(*ORDER_FIELDS, 'user__username')
+        .prefetch_related(order_items_prefetch())
+    )
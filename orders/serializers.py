@@ -1,13 +1,17 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
-from . import models
-from .models import Order, OrderItem, Product
+from .models import Order, OrderItem
+from .queries import order_items_prefetch
+from products.inventory import InsufficientStock, UnknownProducts, reserve_stock
 from products.serializers import ProductSerializer
+from core.metrics import ORDERS
 
 class OrderItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
-    product_id = serializers.PrimaryKeyRelatedField(
-        queryset=Product.objects.all(), source='product', write_only=True
-    )
+    # Resolved in bulk by reserve_stock() rather than one lookup per line.
+    product_id = serializers.IntegerField(write_only=True, min_value=1)
 
     class Meta:
         model = OrderItem
@@ -20,27 +24,54 @@ class OrderSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Order
-        fields = ['id', 'user', 'items', 'total_price', 'status', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'user', 'total_price', 'status', 'created_at', 'updated_at']
+        fields = ['id', 'user', 'items', 'total_price', 'status', 'failure_reason', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'user', 'total_price', 'status', 'failure_reason', 'created_at', 'updated_at']
 
     def create(self, validated_data):
         items_data = validated_data.pop('items')
         user = self.context['request'].user
-        order = Order.objects.create(user=user, total_price=0)  # Initialize total_price
-        total = 0
+        quantities = Counter()
         for item_data in items_data:
-            product = item_data['product']
+            quantities[item_data['product_id']] += item_data['quantity']
+
+        # Fixed number of queries whatever the number of lines: lock + update
+        # products, insert the order, bulk insert the items, load the response.
+        with transaction.atomic():
+            try:
+                reservation = reserve_stock(quantities)
+            except UnknownProducts as exc:
+                ORDERS.labels('sync', 'unknown_product').inc()
+                raise serializers.ValidationError(
+                    {'items': [f'Invalid pk "{pk}" - object does not exist.' for pk in exc.product_ids]}
+                )
+            except InsufficientStock as exc:
+                ORDERS.labels('sync', 'insufficient_stock').inc()
+                raise serializers.ValidationError(f"Insufficient stock for product {exc.products[0].name}.")
+
+            # Released by OrderViewSet.perform_create if its transaction
+            # fails; here only if the insert does.
+            self.reservation = reservation
+            try:
+                order = self._create_order(user, items_data, reservation.products)
+            except Exception:
+                reservation.release()
+                raise
+
+        ORDERS.labels('sync', 'created').inc()
+        prefetch_related_objects([order], order_items_prefetch())
+        return order
+
+    def _create_order(self, user, items_data, products):
+        items = []
+        for item_data in items_data:
+            product = products[item_data['product_id']]
             quantity = item_data['quantity']
-            if product.stock < quantity:
-                raise serializers.ValidationError(f"Insufficient stock for product {product.name}.")
-            price = product.price * quantity
-            OrderItem.objects.create(order=order, product=product, quantity=quantity, price=price)
-            total += price
-            # Update product stock atomically
-            # product.stock = models.F('stock') - quantity
-            # product.save()
-        order.total_price = total
-        order.save()
+            items.append(OrderItem(product=product, quantity=quantity, price=product.price * quantity))
+
+        order = Order.objects.create(user=user, total_price=sum(item.price for item in items))
+        for item in items:
+            item.order = order
+        OrderItem.objects.bulk_create(items)
         return order
     
     def update(self, instance, validated_data):
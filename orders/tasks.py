@@ -1,27 +1,55 @@
 from celery import shared_task
-from django.core.mail import send_mail
-from .models import Order
-from django.conf import settings
+from celery.utils.time import get_exponential_backoff_interval
+from . import emails, ingestion
+
+MAIL_RETRY_BACKOFF_MAX = 600
+
 
 @shared_task(bind=True, max_retries=3)
-def send_order_confirmation_email(order_id, _):
+def send_order_confirmation_emails(self, order_ids):
     try:
-        order = Order.objects.get(id=order_id)
-        subject = f"Order Confirmation - Order #{order.id}"
-        message = f"Dear {order.user.first_name},\n\nYour order has been placed successfully.\n\nOrder Details:\n"
-        for item in order.items.all():
-            message += f"- {item.product.name} (Quantity: {item.quantity})\n"
-        message += "\nThank you for shopping with us!"
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [order.user.email],
-            fail_silently=False,
+        return emails.send_order_confirmations(order_ids)
+    except emails.ConfirmationsNotSent as exc:
+        # Retry only what was not delivered, with the same jittered
+        # exponential backoff as autoretry_for.
+        countdown = get_exponential_backoff_interval(
+            factor=1, retries=self.request.retries, maximum=MAIL_RETRY_BACKOFF_MAX, full_jitter=True
         )
-    except Order.DoesNotExist:
-        # Handle case where order does not exist
-        pass
-    except Exception as e:
-        # Log exception
-        pass
+        raise self.retry(args=[exc.order_ids], exc=exc, countdown=countdown)
+
+
+@shared_task(
+    autoretry_for=(emails.ConfirmationsNotSent,), retry_backoff=True,
+    retry_backoff_max=MAIL_RETRY_BACKOFF_MAX, retry_jitter=True, max_retries=3
+)
+def send_order_confirmation_email(order_id):
+    return emails.send_order_confirmations([order_id])
+
+
+@shared_task
+def flush_order_confirmations():
+    """
+    Drain the confirmation buffer, one email task (and SMTP connection) per batch.
+    """
+    batches = 0
+    while True:
+        order_ids = emails.pop_order_confirmations(emails.BATCH_SIZE)
+        if not order_ids:
+            return batches
+        send_order_confirmation_emails.delay(order_ids)
+        batches += 1
+
+
+@shared_task
+def notify_order_created(order_id):
+    emails.queue_order_confirmation(order_id)
+
+
+@shared_task
+def materialize_pending_orders(order_id=None):
+    # Triggered per accepted order (order_id) and by beat, but always works
+    # through whatever batch is queued.
+    completed = ingestion.materialize_pending_orders()
+    for order_id in completed:
+        emails.queue_order_confirmation(order_id)
+    return len(completed)
@@ -0,0 +1,84 @@
+from unittest import mock
+
+import fakeredis
+from smtplib import SMTPServerDisconnected
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase
+from users.models import User
+from products.models import Category, Product
+from orders import emails, tasks
+from orders.models import Order, OrderItem
+
+
+class OrderConfirmationEmailTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Electronics')
+        products = [
+            Product.objects.create(
+                category=category, name=f'Product {i}', description='Description', price=10, stock=50
+            )
+            for i in range(3)
+        ]
+        self.order_ids = []
+        for n in range(4):
+            user = User.objects.create_user(
+                username=f'customer{n}', email=f'customer{n}@example.com', first_name=f'Name{n}'
+            )
+            order = Order.objects.create(user=user, total_price=30)
+            for product in products:
+                OrderItem.objects.create(order=order, product=product, quantity=n + 1, price=10)
+            self.order_ids.append(order.id)
+
+    def test_batch_is_built_from_one_query_and_one_connection(self):
+        with self.assertNumQueries(1), mock.patch.object(
+            emails, 'get_connection', wraps=emails.get_connection
+        ) as get_connection:
+            sent = emails.send_order_confirmations(self.order_ids)
+
+        self.assertEqual(sent, 4)
+        get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 4)
+        first = mail.outbox[0]
+        self.assertEqual(first.subject, f'Order Confirmation - Order #{self.order_ids[0]}')
+        self.assertEqual(first.to, ['customer0@example.com'])
+        self.assertIn('- Product 2 (Quantity: 1)', first.body)
+
+    def test_failure_partway_retries_only_undelivered(self):
+        send_messages, failures = EmailBackend.send_messages, [self.order_ids[2]]
+
+        def flaky_send(backend, messages):
+            if failures and messages[0].subject.endswith(f'#{failures[0]}'):
+                failures.pop()
+                raise SMTPServerDisconnected('Connection unexpectedly closed')
+            return send_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', flaky_send):
+            with self.assertRaises(emails.ConfirmationsNotSent) as raised:
+                emails.send_order_confirmations(self.order_ids)
+            self.assertEqual(raised.exception.order_ids, self.order_ids[2:])
+            self.assertEqual(raised.exception.sent, 2)
+
+            mail.outbox.clear()
+            failures.append(self.order_ids[2])
+            tasks.send_order_confirmation_emails.apply(args=[self.order_ids])
+
+        subjects = [message.subject for message in mail.outbox]
+        self.assertEqual(subjects, [f'Order Confirmation - Order #{order_id}' for order_id in self.order_ids])
+
+    def test_buffer_drains_in_batches(self):
+        redis = fakeredis.FakeStrictRedis()
+        with mock.patch.object(emails, 'get_redis_connection', return_value=redis):
+            for order_id in self.order_ids:
+                emails.queue_order_confirmation(order_id)
+            self.assertEqual(emails.pop_order_confirmations(3), self.order_ids[:3])
+            self.assertEqual(emails.pop_order_confirmations(3), self.order_ids[3:])
+            self.assertEqual(emails.pop_order_confirmations(3), [])
+
+    def test_redelivered_event_queues_once(self):
+        redis = fakeredis.FakeStrictRedis()
+        with mock.patch.object(emails, 'get_redis_connection', return_value=redis):
+            for _ in range(2):
+                tasks.notify_order_created.apply(kwargs={'order_id': self.order_ids[0]})
+            self.assertEqual(emails.pop_order_confirmations(), [self.order_ids[0]])
@@ -0,0 +1,86 @@
+from hashlib import sha256
+from unittest import mock
+
+from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from users.models import User
+from products.models import Category, Product
+from orders.models import Order
+from orders.views import OrderViewSet
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class OrderIdempotencyTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        category = Category.objects.create(name='Electronics')
+        self.product = Product.objects.create(
+            category=category, name='Smartphone', description='Latest model.', price=800, stock=50
+        )
+        self.url = reverse('api:order-list')
+        self.data = {'items': [{'product_id': self.product.id, 'quantity': 2}]}
+
+    def post(self, data, key='order-123'):
+        return self.client.post(self.url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_first_response(self):
+        first = self.post(self.data)
+        retry = self.post(self.data)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 48)
+
+    def test_keys_are_scoped_per_user(self):
+        self.post(self.data)
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(other).access_token}')
+        self.assertNotIn('Idempotent-Replayed', self.post(self.data))
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_reused_key_with_different_body_is_rejected(self):
+        self.post(self.data)
+        response = self.post({'items': [{'product_id': self.product.id, 'quantity': 1}]})
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def lock_key(self, key='order-123'):
+        return f"idempotency:order:{self.user.pk}:{sha256(key.encode()).hexdigest()}:lock"
+
+    def test_concurrent_duplicate_is_blocked(self):
+        # Simulate the first request still holding the lock.
+        cache.add(self.lock_key(), 1)
+        response = self.post(self.data)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_expired_lock_taken_by_a_duplicate_is_kept(self):
+        perform_create = OrderViewSet.perform_create
+
+        def slow_create(viewset, serializer):
+            # The lock expires and a duplicate takes it while the order is created.
+            cache.set(self.lock_key(), 'duplicate')
+            return perform_create(viewset, serializer)
+
+        with mock.patch.object(OrderViewSet, 'perform_create', slow_create):
+            self.assertEqual(self.post(self.data).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(cache.get(self.lock_key()), 'duplicate')
+
+    def test_rejection_is_replayed(self):
+        data = {'items': [{'product_id': self.product.id, 'quantity': 51}]}
+        first = self.post(data)
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        # Restocking does not turn the retry into a new attempt.
+        Product.objects.filter(pk=self.product.pk).update(stock=100)
+        retry = self.post(data)
+        self.assertEqual((retry.status_code, retry.data), (first.status_code, first.data))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 0)
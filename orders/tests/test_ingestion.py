@@ -0,0 +1,53 @@
+from rest_framework.test import APITestCase
+from django.urls import reverse
+from rest_framework import status
+from users.models import User
+from products.models import Category, Product
+from orders.ingestion import materialize_pending_orders
+from orders.models import Order
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class AsyncOrderIngestionTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        category = Category.objects.create(name='Electronics')
+        self.product = Product.objects.create(
+            category=category, name='Console', description='Flash sale.', price=300, stock=3
+        )
+        self.url = reverse('api:order-list')
+
+    def post_async(self, quantity):
+        data = {'items': [{'product_id': self.product.id, 'quantity': quantity}]}
+        return self.client.post(self.url, data, format='json', HTTP_PREFER='respond-async')
+
+    def test_async_request_is_accepted_without_touching_stock(self):
+        response = self.post_async(2)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response['Location'], response.data['status_url'])
+
+        order = Order.objects.get(pk=response.data['id'])
+        self.assertEqual(order.status, 'PENDING')
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+    def test_batch_fills_orders_in_arrival_order(self):
+        first = self.post_async(2).data['id']
+        second = self.post_async(2).data['id']
+        third = self.post_async(1).data['id']
+
+        self.assertEqual(materialize_pending_orders(), [first, third])
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        statuses = dict(Order.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {first: 'COMPLETED', second: 'CANCELLED', third: 'COMPLETED'})
+
+        status_response = self.client.get(reverse('api:order-detail', args=[first]))
+        self.assertEqual(status_response.data['status'], 'COMPLETED')
+        self.assertEqual(status_response.data['total_price'], '600.00')
+        self.assertEqual(len(status_response.data['items']), 1)
+        self.assertEqual(materialize_pending_orders(), [])
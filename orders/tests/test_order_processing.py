@@ -1,4 +1,6 @@
 from rest_framework.test import APITestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from users.models import User
@@ -29,7 +31,7 @@ class OrderProcessingTest(APITestCase):
         )
 
     def test_create_order(self):
-        url = reverse('order-list')  # Ensure 'order-list' is the correct route name
+        url = reverse('api:order-list')
         data = {
             'items': [
                 {'product_id': self.product1.id, 'quantity': 2},
@@ -48,3 +50,42 @@ class OrderProcessingTest(APITestCase):
         self.product2.refresh_from_db()
         self.assertEqual(self.product1.stock, 48)
         self.assertEqual(self.product2.stock, 99)
+
+    def test_insufficient_stock_rolls_back_order(self):
+        url = reverse('api:order-list')
+        data = {
+            'items': [
+                {'product_id': self.product1.id, 'quantity': 1},
+                {'product_id': self.product2.id, 'quantity': 101},
+            ]
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Order.objects.count(), 0)
+        self.product1.refresh_from_db()
+        self.assertEqual(self.product1.stock, 50)
+
+    def test_unknown_product_is_rejected(self):
+        url = reverse('api:order-list')
+        data = {'items': [{'product_id': 999999, 'quantity': 1}]}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_query_count_does_not_grow_with_order_lines(self):
+        url = reverse('api:order-list')
+        extra = [
+            Product.objects.create(
+                category=self.category, name=f'Cable {i}', description='USB cable.', price=5, stock=10
+            )
+            for i in range(5)
+        ]
+
+        def count_queries(products):
+            data = {'items': [{'product_id': product.id, 'quantity': 1} for product in products]}
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        self.assertEqual(count_queries([self.product1]), count_queries([self.product2] + extra))
@@ -0,0 +1,48 @@
+from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.urls import reverse
+from users.models import User
+from products.models import Category, Product
+from orders.models import Order, OrderItem
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class OrderQueryCountTest(APITestCase):
+    def setUp(self):
+        cache.clear()  # authenticated users are cached between requests
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.customer = User.objects.create_user(username='customer', password='testpass123')
+        categories = [Category.objects.create(name=f'Category {c}') for c in range(3)]
+        products = [
+            Product.objects.create(
+                category=categories[i % 3], name=f'Product {i}', description='Description', price=10, stock=50
+            )
+            for i in range(6)
+        ]
+        for n in range(10):
+            order = Order.objects.create(user=self.customer if n % 2 else self.staff, total_price=30)
+            for product in products[:3]:
+                OrderItem.objects.create(order=order, product=product, quantity=1, price=10)
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_staff_order_list(self):
+        self.authenticate(self.staff)
+        # user lookup (first request) + COUNT + orders joined with users + all items with products
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('api:order-list'))
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_customer_order_list(self):
+        self.authenticate(self.customer)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('api:order-list'))
+        self.assertEqual(response.data['count'], 5)
+
+    def test_order_detail(self):
+        self.authenticate(self.staff)
+        order = Order.objects.first()
+        with self.assertNumQueries(3):
+            self.client.get(reverse('api:order-detail', args=[order.id]))
@@ -1,13 +1,20 @@
 from rest_framework import viewsets, permissions
-from .models import Order
+from .models import Order, OrderItem
 from .serializers import OrderSerializer
+from .queries import orders_for_serializer
 from django.db import transaction
-from .tasks import send_order_confirmation_email
+from core import outbox
+from .ingestion import AsyncIngestionMixin
+from core.export import StreamingExportMixin
+from core.idempotency import IdempotentCreateMixin
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(StreamingExportMixin, IdempotentCreateMixin, AsyncIngestionMixin, viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Order.objects.all()
+    filterset_fields = ['status']
+    export_fields = ['id', 'user', 'status', 'total_price', 'failure_reason', 'created_at', 'updated_at']
+    export_extra_fields = ['items']
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
@@ -16,12 +23,35 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         user = self.request.user
         if user.is_staff:
-            return Order.objects.all()
-        
-        return Order.objects.filter(user=self.request.user).prefetch_related('items__product')
+            queryset = Order.objects.all()
+        else:
+            queryset = Order.objects.filter(user=user)
+
+        # Only actions that render orders need the nested items loaded.
+        if self.action in ('list', 'retrieve', 'update', 'partial_update'):
+            return orders_for_serializer(queryset)
+        return queryset
+
+    def add_export_data(self, rows):
+        items = {row['id']: [] for row in rows}
+        lines = OrderItem.objects.using(self.export_db).filter(order_id__in=items).order_by('id')
+        for line in lines.values('order_id', 'product', 'quantity', 'price'):
+            items[line.pop('order_id')].append(line)
+        for row in rows:
+            row['items'] = items[row['id']]
+        return rows
 
-    @transaction.atomic
     def perform_create(self, serializer):
-        with transaction.atomic():
-            order = serializer.save(user=self.request.user)
-            send_order_confirmation_email.delay(order.id)
\ No newline at end of file
+        # Redis stock reservations do not roll back with the database, so
+        # give them back if anything in this (outermost) transaction fails,
+        # not only the order insert.
+        try:
+            with transaction.atomic():
+                order = serializer.save(user=self.request.user)
+                # Published to Celery by the outbox dispatcher once committed.
+                outbox.publish('order.created', order_id=order.id)
+        except Exception:
+            reservation = getattr(serializer, 'reservation', None)
+            if reservation is not None:
+                reservation.release()
+            raise
\ No newline at end of file
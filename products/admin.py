@@ -1,5 +1,27 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
 from .models import Category, Product
+from .inventory import disable_redis_inventory, enable_redis_inventory
+
+
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ['name', 'category', 'price', 'stock', 'inventory_mode']
+    list_filter = ['inventory_mode', 'category']
+    actions = ['move_stock_to_redis', 'move_stock_to_database']
+
+    @admin.action(description="Reserve stock in Redis (hot products)")
+    def move_stock_to_redis(self, request, queryset):
+        if not settings.INVENTORY_REDIS_ENABLED:
+            self.message_user(request, "Redis inventory is disabled (INVENTORY_REDIS_ENABLED).", messages.ERROR)
+            return
+        for product_id in queryset.filter(inventory_mode='DATABASE').values_list('id', flat=True):
+            enable_redis_inventory(product_id)
+
+    @admin.action(description="Reserve stock in the database")
+    def move_stock_to_database(self, request, queryset):
+        for product_id in queryset.filter(inventory_mode='REDIS').values_list('id', flat=True):
+            disable_redis_inventory(product_id)
+
 
 admin.site.register(Category)
-admin.site.register(Product)
\ No newline at end of file
+admin.site.register(Product, ProductAdmin)
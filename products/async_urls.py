@@ -0,0 +1,10 @@
+from django.urls import path
+from .async_views import AsyncCategoryView, AsyncProductView
+
+# Read-only async mirrors of the catalogue endpoints, for the ASGI service.
+urlpatterns = [
+    path('products/', AsyncProductView.as_view(), name='product-list'),
+    path('products/<str:pk>/', AsyncProductView.as_view(), name='product-detail'),
+    path('categories/', AsyncCategoryView.as_view(), name='category-list'),
+    path('categories/<str:pk>/', AsyncCategoryView.as_view(), name='category-detail'),
+]
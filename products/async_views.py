@@ -0,0 +1,175 @@
+from asgiref.sync import sync_to_async
+from django import forms
+from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse
+from django.views import View
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import (
+    APIException, AuthenticationFailed, NotAuthenticated, Throttled, ValidationError,
+)
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from core.cache import (
+    acached_value, add_cache_headers, aget_generation, cached_representation, not_modified,
+    request_visibility, response_cache_key, response_validators,
+)
+from core.metrics import RESPONSE_CACHE
+from core.renderers import ORJSONRenderer
+from .models import Category
+from .views import CategoryViewSet, ProductViewSet
+
+
+class AsyncCatalogueView(View):
+    """
+    Async, read-only mirror of a catalogue viewset's `list` and `retrieve`.
+
+    Reuses the viewset's queryset, serializer, search/ordering backends and
+    pagination, but reads through the async cache and ORM, so under an
+    ASGI server a worker keeps serving other requests while one waits on
+    Redis or PostgreSQL. Requests are authenticated, so logged-in clients
+    get their own throttle bucket, and responses are cached under the same
+    keys as the viewset's, with the same stampede protection.
+    """
+    http_method_names = ['get', 'head', 'options']
+    viewset_class = None
+    renderer_class = ORJSONRenderer
+
+    async def get(self, request, pk=None):
+        drf_request = Request(
+            request, authenticators=[auth() for auth in self.viewset_class.authentication_classes]
+        )
+        viewset = self.get_viewset(drf_request, 'list' if pk is None else 'retrieve', pk)
+        try:
+            await self.authenticate(drf_request)
+            await self.check_throttles(drf_request, viewset)
+        except APIException as exc:
+            return self.handle_exception(exc, drf_request, viewset)
+
+        suffix = 'list' if pk is None else f'detail:{pk}'
+        namespace = viewset.cache_namespace
+        key = response_cache_key(
+            namespace, request.get_host(), request_visibility(drf_request),
+            f'{viewset.cache_key_prefix}{suffix}', request.GET,
+        )
+        generation = await aget_generation(namespace)
+        validators = response_validators(key, generation, viewset.cache_timeout)
+        response = not_modified(drf_request, validators)
+        if response is not None:
+            RESPONSE_CACHE.labels(namespace, 'not_modified').inc()
+            return response
+
+        async def compute():
+            if pk is None:
+                data = await self.list(drf_request, viewset)
+            else:
+                data = await self.retrieve(drf_request, viewset, pk)
+            return cached_representation(data)
+
+        try:
+            representation, result = await acached_value(
+                key, generation, compute, timeout=viewset.cache_timeout
+            )
+        except (APIException, Http404) as exc:
+            return self.handle_exception(exc, drf_request, viewset)
+        RESPONSE_CACHE.labels(namespace, result).inc()
+        return add_cache_headers(
+            drf_request, self.render(representation['data']), None if result == 'stale' else validators
+        )
+
+    def get_viewset(self, request, action, pk=None):
+        kwargs = {} if pk is None else {'pk': pk}
+        return self.viewset_class(
+            request=request, args=(), kwargs=kwargs, format_kwarg=None, action=action
+        )
+
+    async def authenticate(self, request):
+        # Cached users cost one cache read; others a query, on the ORM's thread.
+        await sync_to_async(lambda: request.user)()
+
+    async def check_throttles(self, request, viewset):
+        # The throttles' Redis calls are blocking; run them off the event loop.
+        for throttle in viewset.get_throttles():
+            if not await sync_to_async(throttle.allow_request, thread_sensitive=False)(request, viewset):
+                raise Throttled(throttle.wait())
+
+    async def filter_queryset(self, request, queryset, viewset):
+        """
+        Apply the viewset's backends that only build SQL. django-filter's
+        backend validates choices with synchronous queries, so subclasses
+        apply their `filterset_fields` themselves.
+        """
+        for backend in viewset.filter_backends:
+            if not issubclass(backend, DjangoFilterBackend):
+                queryset = backend().filter_queryset(request, queryset, viewset)
+        return queryset
+
+    async def list(self, request, viewset):
+        queryset = await self.filter_queryset(request, viewset.get_queryset(), viewset)
+        paginator = viewset.paginator
+        page = None
+        if paginator is not None:
+            page = await paginator.apaginate_queryset(queryset, request, view=viewset)
+        if page is None:
+            return viewset.get_serializer([item async for item in queryset], many=True).data
+        return paginator.get_paginated_response(viewset.get_serializer(page, many=True).data).data
+
+    async def retrieve(self, request, viewset, pk):
+        queryset = viewset.get_queryset()
+        try:
+            instance = await queryset.aget(pk=pk)
+        except (ObjectDoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        return viewset.get_serializer(instance).data
+
+    def handle_exception(self, exc, request, viewset):
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            # As APIView.handle_exception does.
+            auth_header = viewset.get_authenticate_header(request)
+            if auth_header:
+                exc.auth_header = auth_header
+            else:
+                exc.status_code = 403
+        response = exception_handler(exc, {'view': viewset, 'request': request})
+        headers = {name: value for name, value in response.items() if name != 'Content-Type'}
+        return self.render(response.data, status=response.status_code, headers=headers)
+
+    def render(self, data, status=200, headers=None):
+        renderer = self.renderer_class()
+        return HttpResponse(
+            renderer.render(data), status=status, content_type=renderer.media_type, headers=headers
+        )
+
+
+class AsyncProductView(AsyncCatalogueView):
+    viewset_class = ProductViewSet
+
+    async def filter_queryset(self, request, queryset, viewset):
+        # Same parameters and error messages as ProductViewSet.filterset_fields.
+        errors = {}
+        category = request.query_params.get('category')
+        if category:
+            try:
+                category = int(category)
+                exists = await Category.objects.filter(pk=category).aexists()
+            except (TypeError, ValueError):
+                exists = False
+            if exists:
+                queryset = queryset.filter(category_id=category)
+            else:
+                errors['category'] = [forms.ModelChoiceField.default_error_messages['invalid_choice']]
+
+        price = request.query_params.get('price')
+        if price:
+            try:
+                queryset = queryset.filter(price=forms.DecimalField().clean(price))
+            except DjangoValidationError as exc:
+                errors['price'] = exc.messages
+
+        if errors:
+            raise ValidationError(errors)
+        return await super().filter_queryset(request, queryset, viewset)
+
+
+class AsyncCategoryView(AsyncCatalogueView):
+    viewset_class = CategoryViewSet
@@ -0,0 +1,10 @@
+from core.cache import bump_generation
+
+PRODUCT_CACHE_NAMESPACE = 'products'
+
+
+def invalidate_product_cache():
+    """
+    Drop every cached product list/detail response.
+    """
+    bump_generation(PRODUCT_CACHE_NAMESPACE)
@@ -0,0 +1,40 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
+from rest_framework import filters
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Full-text search on `Product.search_vector`, ranked by relevance.
+
+    Uses the GIN-indexed tsvector on PostgreSQL and falls back to DRF's
+    ILIKE search over `search_fields` on other databases.
+    """
+    search_config = 'english'
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms or connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        query = SearchQuery(
+            ' '.join(search_terms), search_type='websearch', config=self.search_config
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+
+class RelevanceOrderingFilter(filters.OrderingFilter):
+    """
+    Orders search results by rank unless the client asks for an explicit ordering.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if (
+            not request.query_params.get(self.ordering_param)
+            and 'search_rank' in queryset.query.annotations
+        ):
+            return ['-search_rank', 'id']
+        return super().get_ordering(request, queryset, view)
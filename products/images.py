@@ -0,0 +1,114 @@
+"""
+Thumbnail and list-size variants of product images.
+
+Each variant is encoded as WebP and JPEG and stored next to the original
+under a name derived from it (`products/lamp.png` gives
+`products/lamp.thumb.webp`, `products/lamp.list.jpg`, ...), so
+regenerating overwrites the same files. `Product.image_variants` records
+their paths and sizes along with the image they were made from; saving a
+product with a different image clears it and queues the
+`product.image_uploaded` outbox event, handled by
+products.tasks.process_product_image.
+"""
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .cache import invalidate_product_cache
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# name -> (bounding box, crop to fill it exactly)
+VARIANTS = {
+    'thumb': ((200, 200), True),
+    'list': ((600, 600), False),
+}
+# name -> (extension, Pillow format, save options)
+FORMATS = {
+    'webp': ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+IMAGE_ERRORS = (OSError, Image.DecompressionBombError)
+
+
+def variant_name(source, variant, format):
+    stem, _ = os.path.splitext(source)
+    return f'{stem}.{variant}.{FORMATS[format][0]}'
+
+
+def storage():
+    return Product._meta.get_field('image').storage
+
+
+def open_image(name):
+    with storage().open(name) as file:
+        image = Image.open(file)
+        # Let the JPEG decoder downscale by up to 8x while decoding.
+        largest = max(max(size) for size, _ in VARIANTS.values())
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+    return image.convert('RGBA' if has_alpha else 'RGB')
+
+
+def resize(image, size, crop):
+    if crop:
+        return ImageOps.fit(image, size, Image.LANCZOS)
+    image = image.copy()
+    image.thumbnail(size, Image.LANCZOS)  # Never upscales
+    return image
+
+
+def encode(image, format):
+    _, pil_format, options = FORMATS[format]
+    if pil_format == 'JPEG' and image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def save_file(name, content):
+    if storage().exists(name):
+        storage().delete(name)  # Otherwise the storage picks a new name
+    return storage().save(name, ContentFile(content))
+
+
+def generate_variants(product_id, invalidate=True):
+    """
+    Render and store the variants of a product's current image and record
+    them; returns the recorded variants, or None when there is nothing to
+    do or the image cannot be read.
+
+    Safe to repeat. If the image changes meanwhile, nothing is recorded and
+    the new image's own event takes over.
+    """
+    source = Product.objects.filter(pk=product_id).values_list('image', flat=True).first()
+    if not source:
+        return None
+    try:
+        image = open_image(source)
+    except IMAGE_ERRORS:
+        logger.warning('Cannot generate variants of %s for product %s.', source, product_id, exc_info=True)
+        return None
+
+    variants = {'source': source}
+    for variant, (size, crop) in VARIANTS.items():
+        resized = resize(image, size, crop)
+        variants[variant] = {'width': resized.width, 'height': resized.height}
+        for format in FORMATS:
+            variants[variant][format] = save_file(variant_name(source, variant, format), encode(resized, format))
+
+    if not Product.objects.filter(pk=product_id, image=source).update(image_variants=variants):
+        return None
+    if invalidate:
+        transaction.on_commit(invalidate_product_cache)
+    return variants
@@ -0,0 +1,266 @@
+"""
+Bulk product import from supplier feeds, upserting on `Product.sku`.
+
+Feeds are CSV (with a header row) or NDJSON (one object per line) with the
+columns sku, name, price and category, and optionally description and
+stock. They are read as a stream and written in chunks: each chunk resolves
+its category names in one query and inserts or updates its products in one
+`INSERT ... ON CONFLICT (sku) DO UPDATE`. Invalid rows are reported and
+skipped; the rest of the feed is still imported. If the database rejects an
+upsert, its rows are retried one at a time so only the offending ones are
+reported.
+
+Product signals are not sent, so the product cache is invalidated once,
+after the whole feed.
+
+Feeds uploaded through the API are stored and imported by a Celery worker
+(`start_import_job`); the job's status and report are kept in the cache.
+"""
+import csv
+import io
+import json
+import logging
+import os
+import uuid
+from itertools import islice
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, transaction
+
+from core import outbox
+
+from .cache import invalidate_product_cache
+from .models import Category, Product
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+FORMATS = ('csv', 'ndjson')
+REQUIRED_FIELDS = ['sku', 'name', 'price']
+# Updated only when a row provides them; new products get these defaults.
+OPTIONAL_FIELDS = {'description': '', 'stock': 0}
+REQUIRED_MESSAGE = 'This field is required.'
+IMPORT_JOB_TIMEOUT = 60 * 60 * 24  # How long a job's status is kept
+IMPORT_JOB_MAX_ERRORS = 100
+
+
+class ImportReport:
+    """
+    Outcome of an import: how many products were written and, per rejected
+    row, its line number, SKU and field errors.
+    """
+
+    def __init__(self):
+        self.imported = 0
+        self.errors = []
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def add_error(self, line, sku, errors):
+        self.errors.append({'line': line, 'sku': sku, 'errors': errors})
+
+    def as_dict(self, max_errors=None):
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors[:max_errors],
+        }
+
+
+def format_for(filename):
+    """
+    The feed format implied by a file name, or None.
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    return {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}.get(extension)
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_ndjson(stream):
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as exc:
+            row = ValidationError(f'Invalid JSON: {exc}')
+        else:
+            if not isinstance(row, dict):
+                row = ValidationError('Expected a JSON object.')
+        yield line, row
+
+
+def clean_row(row):
+    """
+    Validate a feed row with the model fields' own validation.
+
+    Returns `(values, category name, errors)`.
+    """
+    values, errors = {}, {}
+    for name in REQUIRED_FIELDS + list(OPTIONAL_FIELDS):
+        raw = row.get(name)
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if raw is None or raw == '':
+            if name in REQUIRED_FIELDS:
+                errors[name] = [REQUIRED_MESSAGE]
+            continue
+        try:
+            values[name] = Product._meta.get_field(name).clean(raw, None)
+        except ValidationError as exc:
+            errors[name] = exc.messages
+
+    category = row.get('category')
+    category = category.strip() if isinstance(category, str) else ''
+    if not category:
+        errors['category'] = [REQUIRED_MESSAGE]
+    else:
+        try:
+            Category._meta.get_field('name').clean(category, None)
+        except ValidationError as exc:
+            errors['category'] = exc.messages
+    return values, category, errors
+
+
+def resolve_categories(names):
+    """
+    Map category names to ids, creating the missing categories.
+    """
+    ids = dict(Category.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = set(names) - ids.keys()
+    if missing:
+        # Another import may be creating the same names concurrently.
+        Category.objects.bulk_create([Category(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(Category.objects.filter(name__in=missing).values_list('name', 'id'))
+    return ids
+
+
+def import_chunk(rows, report):
+    cleaned = {}  # sku -> (line, values, category); the last row for a SKU wins
+    for line, row in rows:
+        if isinstance(row, ValidationError):
+            report.add_error(line, None, {'non_field_errors': row.messages})
+            continue
+        values, category, errors = clean_row(row)
+        if errors:
+            report.add_error(line, row.get('sku'), errors)
+            continue
+        cleaned[values['sku']] = (line, values, category)
+    if not cleaned:
+        return
+
+    category_ids = resolve_categories({category for _, _, category in cleaned.values()})
+    # Rows only overwrite the columns they provide, and every row of one
+    # upsert updates the same columns, so group the chunk by columns.
+    groups = {}
+    for line, values, category in cleaned.values():
+        groups.setdefault(frozenset(values), []).append(
+            (line, Product(category_id=category_ids[category], **{**OPTIONAL_FIELDS, **values}))
+        )
+    for columns, products in groups.items():
+        update_fields = sorted(columns - {'sku'}) + ['category', 'updated_at']
+        try:
+            upsert([product for _, product in products], update_fields)
+        except DatabaseError:
+            # Find the offending rows: retry the group one row at a time.
+            for line, product in products:
+                try:
+                    upsert([product], update_fields)
+                except DatabaseError as exc:
+                    report.add_error(line, product.sku, {'non_field_errors': [str(exc)]})
+                else:
+                    report.imported += 1
+        else:
+            report.imported += len(products)
+
+
+def upsert(products, update_fields):
+    # In a savepoint, so a failure leaves the caller's transaction usable.
+    with transaction.atomic():
+        Product.objects.bulk_create(
+            products, update_conflicts=True, unique_fields=['sku'], update_fields=update_fields,
+        )
+
+
+def import_products(stream, format='csv', chunk_size=CHUNK_SIZE):
+    """
+    Import a feed from a text stream and return an ImportReport.
+
+    Stock is written as given; for REDIS inventory products the next
+    reconcile_redis_stock run overwrites it from the Redis counter.
+    """
+    if format not in FORMATS:
+        raise ValueError(f'Unsupported format {format!r}; expected one of {", ".join(FORMATS)}.')
+    rows = read_csv(stream) if format == 'csv' else read_ndjson(stream)
+    report = ImportReport()
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            import_chunk(chunk, report)
+    finally:
+        # Also when reading the stream fails part way: earlier chunks are in.
+        if report.imported:
+            transaction.on_commit(invalidate_product_cache)
+    return report
+
+
+def import_job_key(job_id):
+    return f'products:import-job:{job_id}'
+
+
+def get_import_job(job_id):
+    """
+    The status of an import job (with its report once done), or None.
+    """
+    return cache.get(import_job_key(job_id))
+
+
+def start_import_job(upload, format):
+    """
+    Store an uploaded feed and queue its import; returns the job id.
+    """
+    job_id = uuid.uuid4().hex
+    name = default_storage.save(f'imports/{job_id}.{format}', upload)
+    cache.set(import_job_key(job_id), {'status': 'pending'}, IMPORT_JOB_TIMEOUT)
+    with transaction.atomic():
+        outbox.publish('product.import_uploaded', job_id=job_id, name=name, format=format)
+    return job_id
+
+
+def run_import_job(job_id, name, format):
+    """
+    Import a stored feed, record the job's report and delete the feed.
+
+    Returns the recorded status, or None if the feed is already gone (the
+    outbox event was delivered again after the job finished). A job that
+    fails is recorded as failed and its feed deleted all the same.
+    """
+    if not default_storage.exists(name):
+        return None
+    cache.set(import_job_key(job_id), {'status': 'running'}, IMPORT_JOB_TIMEOUT)
+    try:
+        with default_storage.open(name, 'rb') as file:
+            report = import_products(io.TextIOWrapper(file, encoding='utf-8', newline=''), format)
+    except UnicodeDecodeError:
+        # Earlier chunks are in; the rest of the feed is not.
+        job = {'status': 'failed', 'detail': 'The feed must be UTF-8 encoded.'}
+    except Exception as exc:
+        logger.exception("Import job %s failed.", job_id)
+        job = {'status': 'failed', 'detail': f'The import failed: {exc}'}
+    else:
+        job = {'status': 'done', **report.as_dict(max_errors=IMPORT_JOB_MAX_ERRORS)}
+    finally:
+        default_storage.delete(name)
+    cache.set(import_job_key(job_id), job, IMPORT_JOB_TIMEOUT)
+    return job
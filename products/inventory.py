@@ -0,0 +1,395 @@
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, F, Q, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .models import Product
+
+# One hash tag for every counter keeps multi-key scripts on a single
+# Redis Cluster slot.
+STOCK_KEY = 'inventory:{stock}:%s'
+
+# KEYS: counters, ARGV: quantities. Counters that do not exist are skipped
+# and reported back so those products fall through to the database path.
+# Returns {0, missing indexes...} on success or {index} of the first
+# counter that cannot cover its quantity, in which case nothing changes.
+RESERVE_SCRIPT = """
+local missing = {}
+for i, key in ipairs(KEYS) do
+    local stock = redis.call('GET', key)
+    if not stock then
+        table.insert(missing, i)
+    elseif tonumber(stock) < tonumber(ARGV[i]) then
+        return {i}
+    end
+end
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('DECRBY', key, ARGV[i])
+    end
+end
+table.insert(missing, 1, 0)
+return missing
+"""
+
+RELEASE_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('INCRBY', key, ARGV[i])
+    end
+end
+return 1
+"""
+
+
+class UnknownProducts(Exception):
+    def __init__(self, product_ids):
+        super().__init__(f"Unknown products: {product_ids}")
+        self.product_ids = product_ids
+
+
+class InsufficientStock(Exception):
+    def __init__(self, products):
+        super().__init__(f"Insufficient stock for: {products}")
+        self.products = products
+
+
+class RedisInventory:
+    """
+    Stock counters for products in REDIS inventory mode.
+
+    While a product is in that mode its counter is authoritative; the
+    database row is only brought up to date by `reconcile_redis_stock`.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or get_redis_connection('default')
+        self._reserve = self.client.register_script(RESERVE_SCRIPT)
+        self._release = self.client.register_script(RELEASE_SCRIPT)
+
+    @staticmethod
+    def key(product_id):
+        return STOCK_KEY % product_id
+
+    def reserve(self, quantities):
+        """
+        Reserve all of `quantities` or nothing, in one round trip.
+
+        Returns the product ids that have no counter. Raises
+        `InsufficientStock` carrying the failing product id.
+        """
+        product_ids = sorted(quantities)
+        result = self._reserve(
+            keys=[self.key(product_id) for product_id in product_ids],
+            args=[quantities[product_id] for product_id in product_ids],
+        )
+        status, missing = int(result[0]), result[1:]
+        if status:
+            raise InsufficientStock([product_ids[status - 1]])
+        return {product_ids[int(index) - 1] for index in missing}
+
+    def release(self, quantities):
+        if not quantities:
+            return
+        product_ids = sorted(quantities)
+        self._release(
+            keys=[self.key(product_id) for product_id in product_ids],
+            args=[quantities[product_id] for product_id in product_ids],
+        )
+
+    def snapshot(self, product_ids):
+        product_ids = list(product_ids)
+        if not product_ids:
+            return {}
+        values = self.client.mget([self.key(product_id) for product_id in product_ids])
+        return {
+            product_id: int(value)
+            for product_id, value in zip(product_ids, values) if value is not None
+        }
+
+    def seed(self, stock_by_product, overwrite=False):
+        pipe = self.client.pipeline()
+        for product_id, stock in stock_by_product.items():
+            pipe.set(self.key(product_id), stock, nx=not overwrite)
+        pipe.execute()
+
+    def pop(self, product_id):
+        pipe = self.client.pipeline()
+        pipe.get(self.key(product_id))
+        pipe.delete(self.key(product_id))
+        value, _ = pipe.execute()
+        return None if value is None else int(value)
+
+
+class Reservation:
+    def __init__(self, products, redis_quantities=None, inventory=None):
+        self.products = products
+        self.redis_quantities = redis_quantities or {}
+        self.inventory = inventory
+
+    def release(self):
+        """
+        Give back counter reservations; database decrements roll back with
+        the surrounding transaction.
+        """
+        if self.redis_quantities:
+            self.inventory.release(self.redis_quantities)
+            self.redis_quantities = {}
+
+
+def reserve_stock(quantities):
+    """
+    Atomically take `quantities` ({product_id: quantity}) out of stock and
+    return a `Reservation` holding the affected products keyed by id.
+
+    With `INVENTORY_REDIS_ENABLED`, products that have a Redis counter are
+    reserved first by a Lua script, so hot products never take a row lock
+    and Postgres is only touched once that reservation has succeeded. The
+    rest go through `reserve_database_stock`, as do products whose row is
+    not (yet) in REDIS mode: their counter is released and ignored, since
+    `enable_redis_inventory` seeds it before its switch commits. Callers must `release()` the
+    reservation if their transaction fails afterwards.
+    """
+    if not settings.INVENTORY_REDIS_ENABLED:
+        return Reservation(reserve_database_stock(quantities))
+
+    inventory = RedisInventory()
+    try:
+        database_ids = inventory.reserve(quantities)
+    except InsufficientStock as exc:
+        product = Product.objects.only('name').get(pk=exc.products[0])
+        raise InsufficientStock([product])
+
+    redis_quantities = {
+        product_id: quantity for product_id, quantity in quantities.items()
+        if product_id not in database_ids
+    }
+    reservation = Reservation({}, redis_quantities, inventory)
+    try:
+        with transaction.atomic():
+            if redis_quantities:
+                reservation.products.update(Product.objects.in_bulk(list(redis_quantities)))
+                missing = sorted(set(redis_quantities) - set(reservation.products))
+                if missing:
+                    raise UnknownProducts(missing)
+                not_switched = {
+                    product_id: redis_quantities.pop(product_id) for product_id in list(redis_quantities)
+                    if reservation.products[product_id].inventory_mode != 'REDIS'
+                }
+                if not_switched:
+                    inventory.release(not_switched)
+                    for product_id in not_switched:
+                        del reservation.products[product_id]
+                    database_ids |= set(not_switched)
+            reservation.products.update(reserve_database_stock({
+                product_id: quantities[product_id] for product_id in database_ids
+            }))
+            # A product switched to REDIS mode while we waited for its row
+            # lock already has a counter seeded from the pre-decrement stock.
+            switched = {
+                product_id: -quantities[product_id] for product_id in database_ids
+                if reservation.products[product_id].inventory_mode == 'REDIS'
+            }
+            if switched:
+                transaction.on_commit(lambda: inventory.release(switched))
+    except Exception:
+        reservation.release()
+        raise
+    return reservation
+
+
+def reserve_database_stock(quantities):
+    """
+    Lock and decrement stock rows for `quantities` ({product_id: quantity}).
+
+    All rows are locked with a single `SELECT ... FOR UPDATE` in id order,
+    so concurrent reservations over overlapping products queue up instead
+    of deadlocking, and the decrement is one conditional `UPDATE` whatever
+    the number of products. Returns the locked products keyed by id, with
+    `stock` already reflecting the reservation.
+
+    Cached product responses are deliberately not invalidated here: listed
+    stock may lag by the cache timeout, the reservation is authoritative.
+    """
+    if not quantities:
+        return {}
+
+    with transaction.atomic():
+        products = lock_products(quantities)
+        missing = sorted(set(quantities) - set(products))
+        if missing:
+            raise UnknownProducts(missing)
+
+        short = [
+            products[product_id] for product_id in sorted(quantities)
+            if products[product_id].stock < quantities[product_id]
+        ]
+        if short:
+            raise InsufficientStock(short)
+
+        decrement_stock(quantities, products)
+        return products
+
+
+def lock_products(product_ids):
+    """
+    `SELECT ... FOR UPDATE` the given products in id order, keyed by id.
+    Must run inside a transaction.
+
+    Without `INVENTORY_REDIS_ENABLED`, products still in REDIS mode are
+    moved back to the database first, so their counters can never become
+    authoritative again with stale values once the flag is turned back on.
+    """
+    products = {
+        product.id: product
+        for product in Product.objects.select_for_update().filter(
+            id__in=list(product_ids)
+        ).order_by('id')
+    }
+    if not settings.INVENTORY_REDIS_ENABLED:
+        drain_redis_inventory([
+            product for product in products.values() if product.inventory_mode == 'REDIS'
+        ])
+    return products
+
+
+def drain_redis_inventory(products):
+    """
+    Write the counters of locked REDIS-mode `products` back to their rows
+    and switch them to DATABASE mode.
+
+    The counters are read now and dropped on commit (see
+    `settle_counters`), which leaves them in place if the caller's
+    transaction rolls back; an atomic pop would lose them with the rows
+    still in REDIS mode.
+    """
+    if not products:
+        return
+    inventory = RedisInventory()
+    counters = inventory.snapshot(product.id for product in products)
+    for product in products:
+        if product.id in counters:  # A missing counter was evicted: keep the row's stock
+            product.stock = counters[product.id]
+        product.inventory_mode = 'DATABASE'
+        product.save(update_fields=['stock', 'inventory_mode', 'updated_at'])
+    written = {product.id: counters.get(product.id) for product in products}
+    transaction.on_commit(lambda: settle_counters(inventory, written))
+
+
+def settle_counters(inventory, written):
+    """
+    Drop the counters of products moved back to the database, once that
+    has committed. `written` maps product ids to the counter value written
+    to their rows (None if there was no counter); reservations and releases
+    that reached a counter since it was read are carried over to the row.
+    """
+    for product_id, stock in written.items():
+        final = inventory.pop(product_id)
+        if final is not None and stock is not None and final != stock:
+            Product.objects.filter(pk=product_id).update(
+                stock=Greatest(F('stock') + (final - stock), 0), updated_at=timezone.now(),
+            )
+
+
+def decrement_stock(quantities, products):
+    """
+    Take `quantities` off locked `products` with one conditional UPDATE.
+    """
+    if not quantities:
+        return
+    # The WHERE clause re-checks every row, so the update can never take
+    # stock below zero even if the lock was somehow bypassed.
+    condition = reduce(or_, (
+        Q(id=product_id, stock__gte=quantity) for product_id, quantity in quantities.items()
+    ))
+    updated = Product.objects.filter(condition).update(
+        stock=Case(
+            *[When(id=product_id, then=F('stock') - quantity)
+              for product_id, quantity in quantities.items()],
+            output_field=models.IntegerField(),
+        ),
+        updated_at=timezone.now(),
+    )
+    if updated != len(quantities):
+        raise InsufficientStock([products[product_id] for product_id in sorted(quantities)])
+
+    for product_id, quantity in quantities.items():
+        products[product_id].stock -= quantity
+
+
+def enable_redis_inventory(product_id):
+    """
+    Move a product's stock into a Redis counter.
+
+    The counter is seeded before the switch commits; `reserve_stock`
+    ignores it until the row is in REDIS mode, so a rollback leaves it
+    unused (`disable_redis_inventory` drops it).
+    """
+    if not settings.INVENTORY_REDIS_ENABLED:
+        raise ValueError('Redis inventory is disabled (INVENTORY_REDIS_ENABLED).')
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product_id)
+        RedisInventory().seed({product.id: product.stock}, overwrite=True)
+        product.inventory_mode = 'REDIS'
+        product.save(update_fields=['inventory_mode', 'updated_at'])
+
+
+def disable_redis_inventory(product_id):
+    """
+    Write a product's Redis counter back to the database and drop it.
+    """
+    with transaction.atomic():
+        # The row lock holds back database-path reservations until the
+        # counter value has been written back.
+        product = Product.objects.select_for_update().get(pk=product_id)
+        if product.inventory_mode == 'REDIS':
+            drain_redis_inventory([product])
+        else:
+            # Left by an enable that rolled back; none can be seeding while we hold the lock.
+            inventory = RedisInventory()
+            inventory.client.delete(inventory.key(product.id))
+
+
+def drain_all_redis_inventory():
+    """
+    Move every REDIS-mode product back to the database; what the reconcile
+    task does while `INVENTORY_REDIS_ENABLED` is off.
+    """
+    with transaction.atomic():
+        products = list(Product.objects.select_for_update().filter(inventory_mode='REDIS').order_by('id'))
+        drain_redis_inventory(products)
+    return {'drained': len(products)}
+
+
+def reconcile_redis_stock():
+    """
+    Copy Redis counters into `products_product.stock` in one UPDATE and
+    re-seed counters that went missing (eviction, flush) from the database.
+    """
+    inventory = RedisInventory()
+    stored = dict(
+        Product.objects.filter(inventory_mode='REDIS').values_list('id', 'stock')
+    )
+    counters = inventory.snapshot(stored)
+
+    missing = {product_id: stock for product_id, stock in stored.items() if product_id not in counters}
+    if missing:
+        inventory.seed(missing)
+
+    drifted = {
+        product_id: stock for product_id, stock in counters.items() if stored[product_id] != stock
+    }
+    if drifted:
+        Product.objects.filter(id__in=drifted, inventory_mode='REDIS').update(
+            stock=Case(
+                *[When(id=product_id, then=stock) for product_id, stock in drifted.items()],
+                output_field=models.IntegerField(),
+            ),
+            updated_at=timezone.now(),
+        )
+    return {'synced': len(drifted), 'reseeded': len(missing)}
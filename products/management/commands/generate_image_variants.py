@@ -0,0 +1,49 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from products.cache import invalidate_product_cache
+from products.images import generate_variants
+from products.models import Product
+
+
+def generate(product_id):
+    try:
+        return generate_variants(product_id, invalidate=False)
+    finally:
+        connections.close_all()  # This worker thread's connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the thumbnail and list-size variants of existing product images. "
+        "Images are processed in parallel threads; Pillow releases the GIL while it decodes, "
+        "resizes and encodes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=min(8, os.cpu_count() or 1))
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Regenerate every image, not only those without variants.',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1.')
+        products = Product.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            products = products.filter(image_variants__isnull=True)
+        product_ids = list(products.order_by('id').values_list('id', flat=True))
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = list(pool.map(generate, product_ids))
+        generated = sum(result is not None for result in results)
+        if generated:
+            invalidate_product_cache()
+        self.stdout.write(
+            f'Generated variants for {generated} of {len(product_ids)} product images; '
+            f'{len(product_ids) - generated} skipped or unreadable.'
+        )
@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import CHUNK_SIZE, FORMATS, format_for, import_products
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert or update products from a CSV or NDJSON feed, matching on SKU. "
+        "Columns: sku, name, price, category and optionally description and stock."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Feed file, or '-' for standard input.")
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--max-errors', type=int, default=50, help='Rejected rows to list.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or format_for(path)
+        if format is None:
+            raise CommandError('Cannot tell the feed format from the file name; pass --format.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        if path == '-':
+            report = import_products(sys.stdin, format, options['chunk_size'])
+        else:
+            try:
+                with open(path, newline='', encoding='utf-8') as stream:
+                    report = import_products(stream, format, options['chunk_size'])
+            except OSError as exc:
+                raise CommandError(exc)
+
+        for error in report.errors[:options['max_errors']]:
+            messages = '; '.join(
+                f"{field}: {' '.join(messages)}" for field, messages in error['errors'].items()
+            )
+            self.stderr.write(f"Line {error['line']} (SKU {error['sku']}): {messages}")
+        self.stdout.write(f'Imported {report.imported} products; {report.failed} rows rejected.')
@@ -0,0 +1,102 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+SEARCH_CONFIG = 'english'
+BACKFILL_BATCH_SIZE = 5000
+
+CREATE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION products_product_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('{config}', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('{config}', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS products_product_search_vector_trigger ON products_product;
+CREATE TRIGGER products_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON products_product
+    FOR EACH ROW EXECUTE FUNCTION products_product_search_vector_update();
+""".format(config=SEARCH_CONFIG)
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS products_product_search_vector_trigger ON products_product;
+DROP FUNCTION IF EXISTS products_product_search_vector_update();
+"""
+
+CREATE_INDEX_SQL = (
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS product_search_vector_gin '
+    'ON products_product USING gin (search_vector);'
+)
+DROP_INDEX_SQL = 'DROP INDEX CONCURRENTLY IF EXISTS product_search_vector_gin;'
+
+
+def postgres_only(sql):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return operation
+
+
+def backfill_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Product = apps.get_model('products', 'Product')
+    vector = (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+    last_id = 0
+    while True:
+        ids = list(
+            Product.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:BACKFILL_BATCH_SIZE]
+        )
+        if not ids:
+            break
+        # Non-atomic migration: each batch commits on its own, so row locks
+        # are held for one batch only.
+        Product.objects.filter(id__in=ids).update(search_vector=vector)
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('products', '0003_alter_product_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            postgres_only(CREATE_TRIGGER_SQL), postgres_only(DROP_TRIGGER_SQL)
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+        # The GIN index only exists on PostgreSQL; other backends (e.g. the
+        # SQLite test setup) keep the column and fall back to ILIKE search.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='product',
+                    index=django.contrib.postgres.indexes.GinIndex(
+                        fields=['search_vector'], name='product_search_vector_gin'
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(
+                    postgres_only(CREATE_INDEX_SQL), postgres_only(DROP_INDEX_SQL)
+                ),
+            ],
+        ),
+    ]
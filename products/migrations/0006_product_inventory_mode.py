@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='inventory_mode',
+            field=models.CharField(choices=[('DATABASE', 'Database'), ('REDIS', 'Redis')], default='DATABASE', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_inventory_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 class Category(models.Model):
@@ -11,15 +13,39 @@ class Product(models.Model):
     """
     Represents a product available in the e-commerce platform.
     """
-    
+    INVENTORY_CHOICES = [
+        ('DATABASE', 'Database'),
+        ('REDIS', 'Redis'),
+    ]
+
     name = models.CharField(max_length=255, db_index=True)
+    # Supplier/feed key; bulk imports upsert on it (see products.importer).
+    sku = models.CharField(max_length=64, unique=True, null=True)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.IntegerField()
+    # REDIS: stock is reserved against a Redis counter (see products.inventory)
+    # and written back here by the reconcile_redis_stock task.
+    inventory_mode = models.CharField(max_length=10, choices=INVENTORY_CHOICES, default='DATABASE')
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    # Thumbnails of `image` and their sizes, filled in by products.images.
+    image_variants = models.JSONField(null=True, blank=True, editable=False)
     category = models.ForeignKey(Category, related_name='products', on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Weighted tsvector of name (A) and description (B), maintained by a
+    # PostgreSQL trigger installed in migration 0004.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+            # Keyset pagination seeks on (ordering field, id)
+            models.Index(fields=['created_at', 'id'], name='product_created_id_idx'),
+            models.Index(fields=['price', 'id'], name='product_price_id_idx'),
+            # Incremental exports (?since=) seek on (updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='product_updated_id_idx'),
+        ]
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+from django.db.models import Count, F, Max, Min, Q, Value
+from django.db.models.functions import Floor
+
+from .models import Product
+
+# Columns ProductSerializer actually renders; everything else (notably the
+# search_vector tsvector) stays in the database.
+PRODUCT_FIELDS = [
+    'id', 'name', 'description', 'price', 'stock', 'image', 'image_variants',
+    'category', 'created_at', 'updated_at',
+]
+CATEGORY_FIELDS = ['id', 'name', 'description']
+PRICE_BUCKETS = 10  # Price histogram buckets the facets aim for
+PRICE_STEP = Decimal('0.01')
+
+
+def product_fields(prefix=''):
+    return (
+        [f'{prefix}{name}' for name in PRODUCT_FIELDS]
+        + [f'{prefix}category__{name}' for name in CATEGORY_FIELDS]
+    )
+
+
+def products_for_serializer(queryset=None):
+    """
+    Products with their category joined in, loading only serialized columns.
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+    return queryset.select_related('category').only(*product_fields())
+
+
+def product_rows(queryset=None):
+    """
+    Products as `.values()` dicts of the serialized columns, for ProductRowSerializer.
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+    return queryset.values(*product_fields())
+
+
+def price_bucket_size(low, high, buckets=PRICE_BUCKETS):
+    """
+    A 1, 2 or 5 times a power of ten bucket width that splits the price
+    range into at most about `buckets` buckets.
+    """
+    raw = (high - low) / buckets
+    if raw <= 0:
+        return Decimal('1')
+    magnitude = Decimal(10) ** raw.adjusted()
+    for step in (1, 2, 5, 10):
+        size = step * magnitude
+        if raw <= size:
+            break
+    return max(size, PRICE_STEP)
+
+
+def product_facets(queryset):
+    """
+    Counts per category, a price histogram and in-stock/out-of-stock counts
+    for a filtered product queryset, in two grouped queries: one by
+    category (with each category's stock counts and price range) and one
+    by price bucket.
+    """
+    queryset = queryset.order_by()  # Ordering columns would join the GROUP BY
+    categories = list(
+        queryset.values('category', 'category__name').annotate(
+            count=Count('id'),
+            in_stock=Count('id', filter=Q(stock__gt=0)),
+            min_price=Min('price'),
+            max_price=Max('price'),
+        ).order_by('-count', 'category__name')
+    )
+    count = sum(row['count'] for row in categories)
+    in_stock = sum(row['in_stock'] for row in categories)
+
+    price = {'min': None, 'max': None, 'bucket_size': None, 'buckets': []}
+    if categories:
+        low = min(Decimal(row['min_price']) for row in categories)
+        high = max(Decimal(row['max_price']) for row in categories)
+        size = price_bucket_size(low, high)
+        counts = dict(
+            queryset.annotate(bucket=Floor(F('price') / Value(size)))
+            .values('bucket').annotate(count=Count('id')).values_list('bucket', 'count')
+        )
+        counts = {int(bucket): bucket_count for bucket, bucket_count in counts.items()}
+        price = {
+            'min': price_string(low),
+            'max': price_string(high),
+            'bucket_size': price_string(size),
+            'buckets': [
+                {
+                    'min': price_string(bucket * size),
+                    'max': price_string((bucket + 1) * size),
+                    'count': counts.get(bucket, 0),
+                }
+                for bucket in range(min(counts), max(counts) + 1)
+            ],
+        }
+
+    return {
+        'count': count,
+        'categories': [
+            {'id': row['category'], 'name': row['category__name'], 'count': row['count']}
+            for row in categories
+        ],
+        'price': price,
+        'stock': {'in_stock': in_stock, 'out_of_stock': count - in_stock},
+    }
+
+
+def price_string(value):
+    # As DRF renders DecimalFields: a string with the field's decimal places.
+    return str(Decimal(value).quantize(PRICE_STEP))
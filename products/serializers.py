@@ -1,4 +1,9 @@
-from rest_framework import serializers
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from . import images
+from .importer import FORMATS, format_for
 from .models import Category, Product
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -7,6 +12,32 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description']
         read_only_fields = ['id']
 
+class ImageVariantsField(serializers.Field):
+    """
+    Sizes and WebP/JPEG URLs of a product image's variants (see products.images).
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        storage = Product._meta.get_field('image').storage
+        request = self.context.get('request')
+        ret = {}
+        for variant in images.VARIANTS:
+            if variant not in value:
+                continue
+            ret[variant] = {}
+            for key, item in value[variant].items():
+                if key in images.FORMATS:
+                    item = storage.url(item)
+                    if request is not None:
+                        item = request.build_absolute_uri(item)
+                ret[variant][key] = item
+        return ret
+
+
 class ProductSerializer(serializers.ModelSerializer):
     """
     Serializer for the Product model.
@@ -16,12 +47,15 @@ class ProductSerializer(serializers.ModelSerializer):
         queryset=Category.objects.all(), source='category', write_only=True
     )
     image = serializers.ImageField(required=False, allow_null=True)
+    images = ImageVariantsField(
+        source='image_variants', help_text='Thumbnail and list-size variants, once generated'
+    )
 
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'description', 'price', 'stock', 
-            'category', 'category_id', 'image', 
+            'category', 'category_id', 'image', 'images',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
@@ -31,3 +65,93 @@ class ProductSerializer(serializers.ModelSerializer):
             'stock': {'help_text': 'Available stock quantity'},
             'image': {'help_text': 'Product image (optional)'},
         }
+
+
+class ProductImportSerializer(serializers.Serializer):
+    """
+    Upload of a product feed (see products.importer).
+    """
+    file = serializers.FileField(help_text='CSV or NDJSON feed')
+    format = serializers.ChoiceField(
+        choices=FORMATS, required=False, help_text='Defaults to the file extension'
+    )
+
+    def validate(self, attrs):
+        attrs.setdefault('format', format_for(attrs['file'].name))
+        if attrs['format'] is None:
+            raise serializers.ValidationError({'format': 'Cannot tell the feed format from the file name.'})
+        return attrs
+
+
+class ProductRowSerializer(serializers.BaseSerializer):
+    """
+    Read-only `ProductSerializer` for `.values()` rows (see
+    products.queries.product_rows), used for product lists.
+
+    Formats every value with `ProductSerializer`'s own fields, so the output
+    is the same, but skips building model instances and the per-field
+    attribute lookups; each category is serialized once per page.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.categories = {}
+
+    @cached_property
+    def columns(self):
+        """
+        `(output name, row key, formatter)` of ProductSerializer's readable
+        fields, in output order; the formatter of the nested category is None.
+        """
+        columns = []
+        for field in ProductSerializer(context=self.context)._readable_fields:
+            if isinstance(field, CategorySerializer):
+                columns.append((field.field_name, field.source, None))
+            else:
+                columns.append((field.field_name, field.source, self.formatter(field)))
+        return columns
+
+    @cached_property
+    def category_columns(self):
+        return [
+            (field.field_name, f'category__{field.source}', self.formatter(field))
+            for field in CategorySerializer(context=self.context)._readable_fields
+        ]
+
+    def formatter(self, field):
+        if isinstance(field, serializers.FileField):
+            # Rows hold the file name; the field wants a FieldFile for its URL.
+            model_field = Product._meta.get_field(field.source)
+            return lambda name: field.to_representation(model_field.attr_class(None, model_field, name))
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if isinstance(field, serializers.DateTimeField) and str(output_format).lower() == ISO_8601:
+            # DateTimeField looks the current time zone up for every value;
+            # resolve it once and format aware values the same way.
+            field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+            if field_timezone is not None:
+                def to_representation(value):
+                    if isinstance(value, str) or timezone.is_naive(value):
+                        return field.to_representation(value)
+                    value = value.astimezone(field_timezone).isoformat()
+                    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+                return to_representation
+        return field.to_representation
+
+    def category(self, row):
+        category = self.categories.get(row['category'])
+        if category is None:
+            category = self.categories[row['category']] = {
+                name: None if row[key] is None else to_representation(row[key])
+                for name, key, to_representation in self.category_columns
+            }
+        return category
+
+    def to_representation(self, row):
+        ret = {}
+        for name, key, to_representation in self.columns:
+            if to_representation is None:
+                ret[name] = self.category(row)
+            else:
+                value = row[key]
+                ret[name] = None if value is None else to_representation(value)
+        return ret
@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import outbox
+from .cache import invalidate_product_cache
+from .models import Category, Product
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_product_cache_on_change(sender, **kwargs):
+    # Product payloads embed their category, so both models share a namespace.
+    # Bump after commit so readers cannot re-cache the pre-write rows.
+    transaction.on_commit(invalidate_product_cache)
+
+
+@receiver(post_save, sender=Product)
+def queue_image_variants(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    variants = instance.image_variants
+    if instance.image and variants and variants.get('source') == instance.image.name:
+        return
+    if variants is not None:
+        # Made from another image: never serve them for this one.
+        Product.objects.filter(pk=instance.pk).update(image_variants=None)
+        instance.image_variants = None
+    if instance.image:
+        # Also while variants are pending: a save from an instance loaded
+        # before they were recorded has just written them back to null.
+        outbox.publish('product.image_uploaded', product_id=instance.pk)
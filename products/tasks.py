@@ -0,0 +1,27 @@
+from celery import shared_task
+from django.conf import settings
+
+from . import images, importer, inventory
+
+
+@shared_task
+def reconcile_redis_stock():
+    if not settings.INVENTORY_REDIS_ENABLED:
+        return inventory.drain_all_redis_inventory()
+    return inventory.reconcile_redis_stock()
+
+
+@shared_task
+def process_product_image(product_id):
+    """
+    Generate the thumbnail and list-size variants of a product's image.
+    """
+    return images.generate_variants(product_id)
+
+
+@shared_task
+def import_product_feed(job_id, name, format):
+    """
+    Import a feed uploaded to the product import endpoint.
+    """
+    return importer.run_import_job(job_id, name, format)
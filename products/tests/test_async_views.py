@@ -0,0 +1,94 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.models import Category, Product
+from users.models import User
+
+
+class AsyncCatalogueViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Books')
+        other = Category.objects.create(name='Games')
+        for i in range(12):
+            Product.objects.create(
+                category=self.category if i % 2 else other,
+                name=f'Product {i}',
+                description='Description',
+                price=10 + i,
+                stock=5
+            )
+
+    def assertSameBody(self, path, async_path, params=None):
+        expected = self.client.get(path, params)
+        cache.clear()
+        response = self.client.get(async_path, params)
+        self.assertEqual(response.status_code, expected.status_code)
+        # Links point at the async routes; everything else must match byte for byte.
+        body = response.content.decode().replace('/api/async/', '/api/')
+        self.assertEqual(json.loads(body), json.loads(expected.content))
+
+    def test_list_matches_sync_viewset(self):
+        sync_url, async_url = reverse('api:product-list'), reverse('async-api:product-list')
+        self.assertSameBody(sync_url, async_url)
+        self.assertSameBody(sync_url, async_url, {'page': 2, 'ordering': '-price'})
+        self.assertSameBody(sync_url, async_url, {'category': self.category.id, 'search': 'Product'})
+        self.assertSameBody(sync_url, async_url, {'pagination': 'cursor', 'ordering': 'price'})
+        self.assertSameBody(sync_url, async_url, {'category': 999, 'price': 'cheap'})
+        self.assertSameBody(sync_url, async_url, {'page': 9})
+
+    def test_detail_matches_sync_viewset(self):
+        product = Product.objects.first()
+        self.assertSameBody(
+            reverse('api:product-detail', args=[product.id]),
+            reverse('async-api:product-detail', args=[product.id]),
+        )
+        self.assertSameBody(
+            reverse('api:product-detail', args=[0]), reverse('async-api:product-detail', args=[0])
+        )
+        self.assertSameBody(reverse('api:category-list'), reverse('async-api:category-list'))
+        self.assertSameBody(
+            reverse('api:category-list'), reverse('async-api:category-list'), {'pagination': 'cursor'}
+        )
+
+    def test_shares_cache_with_sync_viewset(self):
+        self.client.get(reverse('api:product-list'), {'ordering': 'price'})
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('async-api:product-list'), {'ordering': 'price'})
+        self.assertEqual(len(response.json()['results']), 10)
+
+    async def test_serves_async_client(self):
+        response = await self.async_client.get(reverse('async-api:category-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+
+    def test_rejects_writes(self):
+        response = self.client.post(reverse('async-api:product-list'), {})
+        self.assertEqual(response.status_code, 405)
+
+    def test_applies_anonymous_throttle(self):
+        url = reverse('async-api:category-list')
+        with mock.patch('rest_framework.throttling.AnonRateThrottle.THROTTLE_RATES', {'anon': '1/minute'}):
+            self.client.get(url)
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+
+    def test_authenticated_clients_use_the_user_throttle(self):
+        url = reverse('async-api:category-list')
+        user = User.objects.create_user(username='reader', password='testpass123')
+        token = f'Bearer {RefreshToken.for_user(user).access_token}'
+        with mock.patch('rest_framework.throttling.AnonRateThrottle.THROTTLE_RATES', {'anon': '1/minute'}):
+            self.client.get(url)
+            response = self.client.get(url, HTTP_AUTHORIZATION=token)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_rejects_invalid_token(self):
+        response = self.client.get(reverse('async-api:category-list'), HTTP_AUTHORIZATION='Bearer invalid')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response.headers)
@@ -0,0 +1,90 @@
+from unittest import mock
+
+from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.http import parse_http_date
+from rest_framework import status
+from products.models import Category, Product
+from users.models import User
+
+
+class ProductCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Books')
+        self.other = Category.objects.create(name='Games')
+        for i in range(12):
+            Product.objects.create(
+                category=self.category if i % 2 else self.other,
+                name=f'Product {i}',
+                description='Description',
+                price=10 + i,
+                stock=5
+            )
+        self.url = reverse('api:product-list')
+
+    def test_query_string_variants_are_cached_separately(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url, {'page': 2})
+        filtered = self.client.get(self.url, {'category': self.category.id})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(first.data['results'], second.data['results'])
+        self.assertEqual(filtered.data['count'], 6)
+
+        # Parameter order must not produce a different cache entry.
+        self.client.get(f'{self.url}?ordering=-price&category={self.category.id}')
+        with self.assertNumQueries(0):
+            self.client.get(f'{self.url}?category={self.category.id}&ordering=-price')
+
+    def test_write_invalidates_list_and_detail(self):
+        product = Product.objects.order_by('created_at').first()
+        detail_url = reverse('api:product-detail', args=[product.id])
+        self.client.get(self.url)
+        self.client.get(detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = 'Renamed'
+            product.save()
+
+        self.assertEqual(self.client.get(self.url).data['results'][0]['name'], 'Renamed')
+        self.assertEqual(self.client.get(detail_url).data['name'], 'Renamed')
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage', response['Cache-Control'])
+
+        # Validators come from the generation: the entry is not even read.
+        with self.assertNumQueries(0), mock.patch('core.cache.cached_value') as cached_value:
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        cached_value.assert_not_called()
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assertEqual(not_modified.content, b'')
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(
+            self.client.get(reverse('async-api:product-list'), HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        # Two writes in the same second still move Last-Modified each time.
+        for price in (98, 99):
+            with self.captureOnCommitCallbacks(execute=True):
+                Product.objects.update(price=price)
+                Product.objects.first().save()
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['results'][0]['price'], f'{price}.00')
+            self.assertNotEqual(response['ETag'], etag)
+            self.assertGreater(parse_http_date(response['Last-Modified']), parse_http_date(last_modified))
+            etag, last_modified = response['ETag'], response['Last-Modified']
+
+    def test_authenticated_responses_are_private(self):
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user)
+        response = self.client.get(self.url)
+        self.assertIn('private', response['Cache-Control'])
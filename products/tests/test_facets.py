@@ -0,0 +1,64 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from products.models import Category, Product
+from products.queries import price_bucket_size
+
+
+class ProductFacetsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.books = Category.objects.create(name='Books')
+        self.games = Category.objects.create(name='Games')
+        for price, stock, category in [
+            ('5.00', 0, self.books), ('12.50', 3, self.books), ('19.99', 1, self.books),
+            ('48.00', 0, self.games), ('12.00', 2, self.games),
+        ]:
+            Product.objects.create(
+                category=category, name='Board game', description='Fun', price=price, stock=stock
+            )
+        self.url = reverse('api:product-facets')
+
+    def test_facets(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(response.data['categories'], [
+            {'id': self.books.id, 'name': 'Books', 'count': 3},
+            {'id': self.games.id, 'name': 'Games', 'count': 2},
+        ])
+        self.assertEqual(response.data['stock'], {'in_stock': 3, 'out_of_stock': 2})
+        price = response.data['price']
+        self.assertEqual((price['min'], price['max'], price['bucket_size']), ('5.00', '48.00', '5.00'))
+        self.assertEqual(
+            [(bucket['min'], bucket['count']) for bucket in price['buckets'] if bucket['count']],
+            [('5.00', 1), ('10.00', 2), ('15.00', 1), ('45.00', 1)],
+        )
+        self.assertEqual(len(price['buckets']), 9)
+
+        # Cached until the next product write.
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_follows_filters(self):
+        response = self.client.get(self.url, {'category': self.games.id})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['stock'], {'in_stock': 1, 'out_of_stock': 1})
+
+        response = self.client.get(self.url, {'category': Category.objects.create(name='Empty').id})
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(response.data['price']['buckets'], [])
+
+
+class PriceBucketSizeTest(SimpleTestCase):
+    def test_round_sizes(self):
+        self.assertEqual(price_bucket_size(Decimal('5'), Decimal('48')), Decimal('5'))
+        self.assertEqual(price_bucket_size(Decimal('0'), Decimal('1000')), Decimal('100'))
+        self.assertEqual(price_bucket_size(Decimal('1'), Decimal('1.5')), Decimal('0.05'))
+        self.assertEqual(price_bucket_size(Decimal('9.99'), Decimal('9.99')), Decimal('1'))
@@ -0,0 +1,113 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from core.models import OutboxEvent
+from products.images import generate_variants
+from products.models import Category, Product
+from users.models import User
+
+
+def image_file(name='lamp.png', size=(1200, 800), mode='RGBA'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.category = Category.objects.create(name='Home')
+
+    def create_product(self, **kwargs):
+        return Product.objects.create(
+            category=self.category, name='Lamp', description='Bright', price=20, stock=1, **kwargs
+        )
+
+
+class ImageVariantsTest(MediaRootMixin, TestCase):
+    def test_generate_variants(self):
+        product = self.create_product(image=image_file())
+        self.assertEqual(
+            list(OutboxEvent.objects.values_list('topic', 'payload')),
+            [('product.image_uploaded', {'product_id': product.id})],
+        )
+
+        variants = generate_variants(product.id)
+        self.assertEqual(variants['source'], 'products/lamp.png')
+        self.assertEqual(variants['thumb']['webp'], 'products/lamp.thumb.webp')
+        self.assertEqual(variants['list']['jpeg'], 'products/lamp.list.jpg')
+        self.assertEqual((variants['list']['width'], variants['list']['height']), (600, 400))
+        storage = Product._meta.get_field('image').storage
+        with storage.open(variants['thumb']['jpeg']) as file:
+            thumb = Image.open(file)
+            self.assertEqual((thumb.format, thumb.size, thumb.mode), ('JPEG', (200, 200), 'RGB'))
+
+        # Regenerating overwrites the same files.
+        self.assertEqual(generate_variants(product.id), variants)
+
+    def test_new_image_clears_variants(self):
+        product = self.create_product(image=image_file())
+        generate_variants(product.id)
+        product.refresh_from_db()
+        product.stock = 3
+        product.save()
+        self.assertIsNotNone(Product.objects.get().image_variants)
+
+        product.image = image_file('desk.png')
+        product.save()
+        self.assertIsNone(Product.objects.get().image_variants)
+        self.assertEqual(OutboxEvent.objects.count(), 2)
+
+    def test_unreadable_image(self):
+        product = self.create_product(image=SimpleUploadedFile('broken.png', b'not an image'))
+        with self.assertLogs('products.images', 'WARNING'):
+            self.assertIsNone(generate_variants(product.id))
+        self.assertIsNone(Product.objects.get().image_variants)
+
+
+class ImagesFieldTest(MediaRootMixin, APITestCase):
+    def test_urls_in_responses(self):
+        product = self.create_product(image=image_file())
+        generate_variants(product.id)
+        detail = self.client.get(reverse('api:product-detail', args=[product.id])).data
+        listed = self.client.get(reverse('api:product-list')).data['results'][0]
+        self.assertEqual(detail['images'], listed['images'])
+        self.assertEqual(detail['images']['thumb'], {
+            'width': 200,
+            'height': 200,
+            'webp': 'http://testserver/media/products/lamp.thumb.webp',
+            'jpeg': 'http://testserver/media/products/lamp.thumb.jpg',
+        })
+
+    def test_upload_through_api(self):
+        self.client.force_authenticate(User.objects.create_user(username='seller', password='testpass123'))
+        response = self.client.post(reverse('api:product-list'), {
+            'name': 'Lamp', 'description': 'Bright', 'price': '20.00', 'stock': 1,
+            'category_id': self.category.id, 'image': image_file(),
+        }, format='multipart')
+        # Variants are made by a worker once the outbox event is dispatched.
+        self.assertIsNone(response.data['images'])
+        self.assertTrue(OutboxEvent.objects.filter(topic='product.image_uploaded').exists())
+
+
+class BackfillCommandTest(MediaRootMixin, TransactionTestCase):
+    def test_backfill(self):
+        with_image = self.create_product(image=image_file())
+        self.create_product()
+        out = io.StringIO()
+        call_command('generate_image_variants', workers=1, stdout=out)
+        self.assertIn('Generated variants for 1 of 1 product images', out.getvalue())
+        self.assertEqual(Product.objects.get(pk=with_image.pk).image_variants['source'], 'products/lamp.png')
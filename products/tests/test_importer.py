@@ -0,0 +1,155 @@
+import io
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import OutboxEvent
+from products.importer import import_products
+from products.models import Category, Product
+from products.tasks import import_product_feed
+from users.models import User
+
+
+class ImportProductsTest(TestCase):
+    def setUp(self):
+        self.books = Category.objects.create(name='Books')
+        self.existing = Product.objects.create(
+            category=self.books, sku='BK-1', name='Old name', description='Kept', price=5, stock=9
+        )
+
+    def test_csv_upserts_on_sku(self):
+        feed = io.StringIO(
+            'sku,name,price,category\n'
+            'BK-1,New name,12.50,Books\n'
+            'TY-1,Yo-yo,1,Toys\n'
+            'TY-2,,abc,\n'
+            'TY-3,Kite,3,Toys\n'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            report = import_products(feed, 'csv', chunk_size=2)
+
+        self.assertEqual(report.imported, 3)
+        self.assertEqual(report.errors, [{
+            'line': 4, 'sku': 'TY-2',
+            'errors': {'name': ['This field is required.'], 'price': ['“abc” value must be a decimal number.'],
+                       'category': ['This field is required.']},
+        }])
+        self.existing.refresh_from_db()
+        # Columns missing from the feed are left alone.
+        self.assertEqual(
+            (self.existing.name, self.existing.price, self.existing.description, self.existing.stock),
+            ('New name', Decimal('12.50'), 'Kept', 9),
+        )
+        toys = Category.objects.get(name='Toys')
+        self.assertEqual(list(toys.products.order_by('sku').values_list('sku', 'stock')), [('TY-1', 0), ('TY-3', 0)])
+
+    def test_ndjson_chunk_queries(self):
+        feed = io.StringIO(''.join(
+            f'{{"sku": "SKU-{i}", "name": "Product {i}", "price": {i}, "stock": {i}, "category": "Books"}}\n'
+            for i in range(50)
+        ) + 'not json\n')
+        # Categories, then the upsert (in a savepoint) for the only chunk.
+        with self.assertNumQueries(4):
+            report = import_products(feed, 'ndjson')
+        self.assertEqual((report.imported, report.failed), (50, 1))
+        self.assertEqual(Product.objects.get(sku='SKU-7').stock, 7)
+
+    def test_database_error_rejects_only_offending_rows(self):
+        bulk_create = Product.objects.bulk_create
+
+        def reject_bad_sku(products, **kwargs):
+            if any(product.sku == 'BAD' for product in products):
+                raise IntegrityError('rejected BAD')
+            return bulk_create(products, **kwargs)
+
+        feed = io.StringIO('sku,name,price,category\nA-1,Lamp,2,Home\nBAD,Desk,3,Home\nA-2,Rug,4,Home\n')
+        with mock.patch.object(Product.objects, 'bulk_create', side_effect=reject_bad_sku):
+            report = import_products(feed, 'csv')
+        self.assertEqual(report.imported, 2)
+        self.assertEqual(report.errors, [{'line': 3, 'sku': 'BAD', 'errors': {'non_field_errors': ['rejected BAD']}}])
+        self.assertEqual(
+            list(Product.objects.filter(category__name='Home').order_by('sku').values_list('sku', flat=True)),
+            ['A-1', 'A-2'],
+        )
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as feed:
+            feed.write('sku,name,price,category,stock\nBK-1,Renamed,7,Books,3\n')
+        self.addCleanup(os.remove, feed.name)
+        out = io.StringIO()
+        call_command('import_products', feed.name, stdout=out)
+        self.assertIn('Imported 1 products; 0 rows rejected.', out.getvalue())
+        self.assertEqual(Product.objects.get(sku='BK-1').stock, 3)
+
+
+class ImportEndpointTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.url = reverse('api:product-import')
+        self.feed = b'{"sku": "A-1", "name": "Lamp", "price": "20.00", "category": "Home"}\n'
+
+    def upload(self):
+        return {'file': SimpleUploadedFile('feed.ndjson', self.feed)}
+
+    def test_staff_only(self):
+        self.client.force_authenticate(User.objects.create_user(username='customer', password='testpass123'))
+        response = self.client.post(self.url, self.upload(), format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import(self):
+        self.client.force_authenticate(
+            User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, self.upload(), format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.client.get(response.data['url']).data['status'], 'pending')
+
+        # Run by a worker once the outbox event is dispatched.
+        event = OutboxEvent.objects.get(topic='product.import_uploaded')
+        import_product_feed(**event.payload)
+        self.assertEqual(self.client.get(response.data['url']).data, {
+            'job_id': response.data['job_id'], 'status': 'done', 'imported': 1, 'failed': 0, 'errors': [],
+        })
+        self.assertEqual(Product.objects.get(sku='A-1').category.name, 'Home')
+        self.assertFalse(default_storage.exists(event.payload['name']))
+        # A redelivered event finds the feed gone.
+        self.assertIsNone(import_product_feed(**event.payload))
+
+    def test_failed_job_is_recorded_and_feed_deleted(self):
+        self.client.force_authenticate(
+            User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, self.upload(), format='multipart')
+        event = OutboxEvent.objects.get(topic='product.import_uploaded')
+        with mock.patch('products.importer.import_products', side_effect=DatabaseError('connection lost')):
+            import_product_feed(**event.payload)
+        self.assertEqual(self.client.get(response.data['url']).data, {
+            'job_id': response.data['job_id'], 'status': 'failed', 'detail': 'The import failed: connection lost',
+        })
+        self.assertFalse(default_storage.exists(event.payload['name']))
+
+    def test_unknown_job(self):
+        self.client.force_authenticate(
+            User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        )
+        url = reverse('api:product-import-status', args=['0' * 32])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,143 @@
+from unittest import mock
+
+import fakeredis
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from orders.models import Order
+from products import inventory
+from products.inventory import InsufficientStock, RedisInventory, reserve_stock
+from products.models import Category, Product
+from users.models import User
+
+
+@override_settings(INVENTORY_REDIS_ENABLED=True)
+class RedisInventoryTest(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        patcher = mock.patch.object(inventory, 'get_redis_connection', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        category = Category.objects.create(name='Electronics')
+        self.hot = Product.objects.create(
+            category=category, name='Console', description='Flash sale.', price=300, stock=5
+        )
+        self.regular = Product.objects.create(
+            category=category, name='Controller', description='Spare pad.', price=50, stock=10
+        )
+        inventory.enable_redis_inventory(self.hot.id)
+
+    def test_hot_products_reserve_against_counter(self):
+        reservation = reserve_stock({self.hot.id: 2, self.regular.id: 3})
+        self.assertEqual(set(reservation.products), {self.hot.id, self.regular.id})
+        self.assertEqual(RedisInventory().snapshot([self.hot.id]), {self.hot.id: 3})
+
+        self.hot.refresh_from_db()
+        self.regular.refresh_from_db()
+        self.assertEqual(self.hot.stock, 5)  # Until reconciliation
+        self.assertEqual(self.regular.stock, 7)
+
+    def test_shortage_reserves_nothing(self):
+        with self.assertRaises(InsufficientStock):
+            reserve_stock({self.hot.id: 6, self.regular.id: 1})
+        self.assertEqual(RedisInventory().snapshot([self.hot.id]), {self.hot.id: 5})
+        self.regular.refresh_from_db()
+        self.assertEqual(self.regular.stock, 10)
+
+    def test_failed_database_step_releases_counters(self):
+        with self.assertRaises(InsufficientStock):
+            reserve_stock({self.hot.id: 1, self.regular.id: 11})
+        self.assertEqual(RedisInventory().snapshot([self.hot.id]), {self.hot.id: 5})
+
+    def test_failed_order_transaction_releases_counters(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='buyer', password='testpass123'))
+        with mock.patch('orders.views.outbox.publish', side_effect=RuntimeError('outbox down')):
+            with self.assertRaises(RuntimeError):
+                client.post(
+                    reverse('api:order-list'),
+                    {'items': [{'product_id': self.hot.id, 'quantity': 2}]},
+                    format='json',
+                )
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(RedisInventory().snapshot([self.hot.id]), {self.hot.id: 5})
+
+    def test_reconcile_writes_counters_back_and_reseeds(self):
+        reserve_stock({self.hot.id: 4})
+        self.assertEqual(inventory.reconcile_redis_stock(), {'synced': 1, 'reseeded': 0})
+        self.hot.refresh_from_db()
+        self.assertEqual(self.hot.stock, 1)
+
+        self.redis.flushall()
+        self.assertEqual(inventory.reconcile_redis_stock(), {'synced': 0, 'reseeded': 1})
+        self.assertEqual(RedisInventory().snapshot([self.hot.id]), {self.hot.id: 1})
+
+    def test_turning_the_flag_off_moves_stock_back_to_the_database(self):
+        reserve_stock({self.hot.id: 2})  # Counter 3, row still 5
+        with override_settings(INVENTORY_REDIS_ENABLED=False):
+            with self.captureOnCommitCallbacks(execute=True):
+                reserve_stock({self.hot.id: 1})
+            self.hot.refresh_from_db()
+            self.assertEqual((self.hot.stock, self.hot.inventory_mode), (2, 'DATABASE'))
+            self.assertEqual(RedisInventory().snapshot([self.hot.id]), {})
+            with self.assertRaises(ValueError):
+                inventory.enable_redis_inventory(self.hot.id)
+
+        # Back on: the database is authoritative and nothing overwrites it.
+        self.assertEqual(inventory.reconcile_redis_stock(), {'synced': 0, 'reseeded': 0})
+        reserve_stock({self.hot.id: 2})
+        self.hot.refresh_from_db()
+        self.assertEqual(self.hot.stock, 0)
+
+    def test_drain_keeps_counters_when_the_reservation_fails(self):
+        reserve_stock({self.hot.id: 2})
+        with override_settings(INVENTORY_REDIS_ENABLED=False):
+            with self.captureOnCommitCallbacks(execute=True), self.assertRaises(InsufficientStock):
+                reserve_stock({self.hot.id: 4})
+            self.hot.refresh_from_db()
+            self.assertEqual((self.hot.stock, self.hot.inventory_mode), (5, 'REDIS'))
+            self.assertEqual(RedisInventory().snapshot([self.hot.id]), {self.hot.id: 3})
+
+            self.assertEqual(inventory.drain_all_redis_inventory(), {'drained': 1})
+            self.hot.refresh_from_db()
+            self.assertEqual((self.hot.stock, self.hot.inventory_mode), (3, 'DATABASE'))
+
+    def test_disable_writes_counter_back(self):
+        reserve_stock({self.hot.id: 2})
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory.disable_redis_inventory(self.hot.id)
+            # Reserved against the counter before the switch committed.
+            reserve_stock({self.hot.id: 1})
+        self.hot.refresh_from_db()
+        self.assertEqual((self.hot.stock, self.hot.inventory_mode), (2, 'DATABASE'))
+        self.assertEqual(RedisInventory().snapshot([self.hot.id]), {})
+
+    def test_failed_disable_keeps_counter(self):
+        reserve_stock({self.hot.id: 2})
+        with self.captureOnCommitCallbacks(execute=True), self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                inventory.disable_redis_inventory(self.hot.id)
+                raise RuntimeError('rolled back')
+        self.hot.refresh_from_db()
+        self.assertEqual((self.hot.stock, self.hot.inventory_mode), (5, 'REDIS'))
+        self.assertEqual(RedisInventory().snapshot([self.hot.id]), {self.hot.id: 3})
+        self.assertEqual(inventory.reconcile_redis_stock(), {'synced': 1, 'reseeded': 0})
+
+    def test_counter_of_a_rolled_back_enable_is_ignored(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            inventory.enable_redis_inventory(self.regular.id)
+            raise RuntimeError('rolled back')
+        self.assertEqual(RedisInventory().snapshot([self.regular.id]), {self.regular.id: 10})
+
+        reservation = reserve_stock({self.regular.id: 3})
+        self.assertEqual(reservation.redis_quantities, {})
+        self.regular.refresh_from_db()
+        self.assertEqual(self.regular.stock, 7)
+        self.assertEqual(RedisInventory().snapshot([self.regular.id]), {self.regular.id: 10})
+
+        inventory.disable_redis_inventory(self.regular.id)
+        self.assertEqual(RedisInventory().snapshot([self.regular.id]), {})
+        self.regular.refresh_from_db()
+        self.assertEqual(self.regular.stock, 7)
@@ -0,0 +1,32 @@
+from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.urls import reverse
+from products.models import Category, Product
+
+
+class ProductQueryCountTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        for c in range(3):
+            category = Category.objects.create(name=f'Category {c}')
+            for i in range(4):
+                Product.objects.create(
+                    category=category, name=f'Product {c}-{i}', description='Description', price=10, stock=5
+                )
+
+    def test_product_list(self):
+        with self.assertNumQueries(2):  # COUNT + one joined page query
+            self.client.get(reverse('api:product-list'))
+
+    def test_product_list_cursor_mode(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api:product-list'), {'pagination': 'cursor'})
+
+    def test_product_detail(self):
+        product = Product.objects.first()
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api:product-detail', args=[product.id]))
+
+    def test_category_list(self):
+        with self.assertNumQueries(2):
+            self.client.get(reverse('api:category-list'))
@@ -0,0 +1,46 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from products.models import Category, Product
+
+
+class ProductSearchTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Books')
+        self.in_name = Product.objects.create(
+            category=self.category,
+            name='Django for Beginners',
+            description='A practical introduction.',
+            price=30,
+            stock=10
+        )
+        self.in_description = Product.objects.create(
+            category=self.category,
+            name='Web Development',
+            description='Covers Django, Flask and more.',
+            price=40,
+            stock=10
+        )
+        Product.objects.create(
+            category=self.category,
+            name='Cooking Basics',
+            description='Recipes for everyone.',
+            price=20,
+            stock=10
+        )
+        self.url = reverse('api:product-list')
+
+    def test_search_matches_name_and_description(self):
+        response = self.client.get(self.url, {'search': 'django'})
+        ids = {item['id'] for item in response.data['results']}
+        self.assertEqual(ids, {self.in_name.id, self.in_description.id})
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search requires PostgreSQL')
+    def test_name_matches_rank_above_description_matches(self):
+        response = self.client.get(self.url, {'search': 'django'})
+        ids = [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, [self.in_name.id, self.in_description.id])
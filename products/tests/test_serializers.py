@@ -0,0 +1,65 @@
+import io
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+from products.models import Category, Product
+from products.queries import product_rows, products_for_serializer
+from products.serializers import ProductRowSerializer, ProductSerializer
+
+
+class ProductRowSerializerTest(TestCase):
+    def setUp(self):
+        books = Category.objects.create(name='Books', description='Paper and ink')
+        toys = Category.objects.create(name='Jouets')  # No description
+        Product.objects.create(
+            category=books, name='Crème brûlée cookbook', description='Recettes', price=Decimal('12.5'),
+            stock=3, image='products/cookbook.png', image_variants={
+                'source': 'products/cookbook.png',
+                'thumb': {'width': 200, 'height': 200, 'webp': 'products/cookbook.thumb.webp',
+                          'jpeg': 'products/cookbook.thumb.jpg'},
+            },
+        )
+        Product.objects.create(category=toys, name='Yo-yo', description='', price=1, stock=0)
+        Product.objects.create(category=books, name='Atlas', description='Maps', price=Decimal('99.99'), stock=7)
+        self.context = {'request': APIRequestFactory().get('/api/products/')}
+
+    def test_renders_the_same_bytes_as_product_serializer(self):
+        expected = JSONRenderer().render(
+            ProductSerializer(products_for_serializer().order_by('id'), many=True, context=self.context).data
+        )
+        rows = ProductRowSerializer(product_rows().order_by('id'), many=True, context=self.context).data
+        self.assertEqual(ORJSONRenderer().render(rows), expected)
+        self.assertIn(b'http://testserver/media/products/cookbook.png', expected)
+        self.assertIn(b'http://testserver/media/products/cookbook.thumb.webp', expected)
+
+
+class ORJSONTest(TestCase):
+    def test_renderer_matches_stdlib_renderer(self):
+        data = {
+            'decimal': Decimal('1.50'),
+            'when': datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+            'lazy': gettext_lazy('Not found.'),
+            'error': ErrorDetail('Invalid.', code='invalid'),
+            1: ['ünïcode', None, True, 2.5, ('tuple',)],
+            'separator': 'a\u2028b\u2029c',
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+    def test_parser(self):
+        parser = ORJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"name": "Crème"}'.encode())), {'name': 'Crème'})
+        for body in (b'{"price": NaN}', b'{'):
+            with self.assertRaises(ParseError):
+                parser.parse(io.BytesIO(body))
@@ -1,28 +1,95 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from .importer import get_import_job, start_import_job
 from .models import Product, Category
-from .serializers import ProductSerializer, CategorySerializer
+from .serializers import ProductImportSerializer, ProductRowSerializer, ProductSerializer, CategorySerializer
+from .filters import ProductSearchFilter, RelevanceOrderingFilter
+from .queries import product_facets, product_rows, products_for_serializer
 from django_filters.rest_framework import DjangoFilterBackend
-from django.core.cache import cache
-from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
+from core.cache import VersionedCacheMixin
+from core.export import StreamingExportMixin
+from .cache import PRODUCT_CACHE_NAMESPACE
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(VersionedCacheMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_namespace = PRODUCT_CACHE_NAMESPACE  # Category changes bump it too
+    cache_key_prefix = 'categories:'
 
 
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.select_related('category').all()
+class ProductViewSet(StreamingExportMixin, VersionedCacheMixin, viewsets.ModelViewSet):
+    queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend,
-        filters.SearchFilter, filters.OrderingFilter]
+        ProductSearchFilter, RelevanceOrderingFilter]
     filterset_fields = ['category', 'price']
-    search_fields = ['name', 'description']
+    search_fields = ['name', 'description']  # ILIKE fallback outside PostgreSQL
     ordering_fields = ['price', 'created_at']
     ordering = ['created_at']  # Default ordering
+    cache_namespace = PRODUCT_CACHE_NAMESPACE  # Invalidated by products.signals
+    export_fields = [
+        'id', 'sku', 'name', 'description', 'price', 'stock', 'category', 'category__name',
+        'image', 'created_at', 'updated_at',
+    ]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('destroy', 'export', 'facets'):
+            return queryset
+        if self.action == 'list':
+            return product_rows(queryset)  # Rendered by ProductRowSerializer
+        return products_for_serializer(queryset)
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ProductRowSerializer
+        if self.action == 'bulk_import':
+            return ProductImportSerializer
+        return super().get_serializer_class()
+
+    @swagger_auto_schema(
+        operation_description="Category counts, a price histogram and stock counts for the current search and filters.",
+        responses={200: "Facet counts"}
+    )
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        return self.cached_response(
+            request, 'facets',
+            lambda: Response(product_facets(self.filter_queryset(self.get_queryset())))
+        )
+
+    @swagger_auto_schema(
+        operation_description="Queue an insert or update of products from a CSV or NDJSON feed, matching on SKU (staff only).",
+        responses={202: "The import job id and its status URL"}
+    )
+    @action(detail=False, methods=['post'], url_path='import', url_name='import',
+            permission_classes=[permissions.IsAdminUser], parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        # Feeds can take longer than a worker timeout, so a Celery worker runs them.
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job_id = start_import_job(serializer.validated_data['file'], serializer.validated_data['format'])
+        url = self.reverse_action('import-status', args=[job_id])
+        return Response({'job_id': job_id, 'status': 'pending', 'url': url}, status=status.HTTP_202_ACCEPTED)
+
+    @swagger_auto_schema(
+        operation_description="Status of a product import job, with imported and rejected row counts and the first errors once done.",
+        responses={200: "Job status and report"}
+    )
+    @action(detail=False, methods=['get'], url_path=r'import/(?P<job_id>[0-9a-f]{32})', url_name='import-status',
+            permission_classes=[permissions.IsAdminUser])
+    def import_status(self, request, job_id):
+        job = get_import_job(job_id)
+        if job is None:
+            raise NotFound('Unknown or expired import job.')
+        return Response({'job_id': job_id, **job})
 
 
     @swagger_auto_schema(
@@ -32,7 +99,6 @@ class ProductViewSet(viewsets.ModelViewSet):
     )
     def perform_create(self, serializer):
         serializer.save()
-        cache.delete('product_list')  # Invalidate cache on new product
 
     @swagger_auto_schema(
         operation_description="Update an existing product.",
@@ -41,7 +107,6 @@ class ProductViewSet(viewsets.ModelViewSet):
     )
     def perform_update(self, serializer):
         serializer.save()
-        cache.delete('product_list')  # Invalidate cache on product update
 
     @swagger_auto_schema(
         operation_description="Delete a product.",
@@ -49,7 +114,6 @@ class ProductViewSet(viewsets.ModelViewSet):
     )
     def perform_destroy(self, instance):
         instance.delete()
-        cache.delete('product_list')  # Invalidate cache on product deletion
     @swagger_auto_schema(
         operation_description="Create a new product.",
         request_body=ProductSerializer,
@@ -65,13 +129,14 @@ class ProductViewSet(viewsets.ModelViewSet):
     )
     
     def list(self, request, *args, **kwargs):
-        cached_products = cache.get('product_list')
-        if cached_products:
-            return Response(cached_products)
-        
-        response = super().list(request, *args, **kwargs)
-        cache.set('product_list', response.data, timeout=300)  # Cache for 5 minutes
-        return response
+        return super().list(request, *args, **kwargs)  # Cached per query string for 5 minutes
+
+    @swagger_auto_schema(
+        operation_description="Retrieve a single product.",
+        responses={200: ProductSerializer}
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
     
     
     # Similarly, decorate other actions as needed
\ No newline at end of file
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_CACHE_TIMEOUT = 60
+# What authentication and the permission checks read; other fields are
+# loaded from the database on first access.
+CACHED_USER_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def user_cache_key(user_id):
+    return f'auth:user-fields:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def cached_user_entry(user):
+    """
+    The cache entry for `user`: its `CACHED_USER_FIELDS` and a digest of its
+    password hash for the revoked-token check, never the hash itself.
+    """
+    fields = [f.attname for f in user._meta.concrete_fields if f.attname in CACHED_USER_FIELDS]
+    return {
+        'fields': fields,
+        'values': [getattr(user, name) for name in fields],
+        'password': get_md5_hash_password(user.password),
+    }
+
+
+def user_from_entry(entry):
+    # Fields that are not cached are deferred.
+    return get_user_model().from_db(None, entry['fields'], entry['values'])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the token's user from the cache.
+
+    Only `CACHED_USER_FIELDS` are cached, for `USER_CACHE_TIMEOUT` seconds,
+    and evicted whenever they are saved or deleted (see users.signals),
+    which covers deactivation and password changes. Writes that bypass `save()`, such
+    as `QuerySet.update()`, are picked up when the entry expires.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            user = super().get_user(validated_token)
+            cache.set(key, cached_user_entry(user), timeout=USER_CACHE_TIMEOUT)
+            return user
+
+        user = user_from_entry(entry)
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != entry['password']:
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return user
@@ -0,0 +1,54 @@
+from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from users.authentication import user_cache_key
+from users.models import User
+from products.models import Category, Product
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        category = Category.objects.create(name='Books')
+        Product.objects.create(category=category, name='Book', description='Paperback.', price=10, stock=3)
+        self.url = reverse('api:product-list')
+
+    def test_cached_catalogue_read_needs_no_queries(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deactivation_takes_effect_immediately(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_refreshes_cached_user(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('newpass456')
+            self.user.save()
+        with self.assertNumQueries(1):  # user reloaded, product list still cached
+            self.client.get(self.url)
+
+    def test_cache_holds_no_password_hash(self):
+        self.client.get(self.url)
+        entry = cache.get(user_cache_key(self.user.pk))
+        self.assertNotIn(self.user.password, str(entry))
+        self.assertNotIn('email', entry['fields'])
+
+        # Fields left out of the cache are loaded on access.
+        User.objects.filter(pk=self.user.pk).update(email='reader@example.com')
+        response = self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.assertEqual(response.wsgi_request.user.email, 'reader@example.com')
+        self.assertEqual(str(response.wsgi_request.user), 'testuser')